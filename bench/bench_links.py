@@ -0,0 +1,144 @@
+"""
+Micro-benchmark do canonizador/classificador de links sobre o corpus de âncoras em
+bench/fixtures/ancoras.json (hrefs e títulos tirados das páginas salvas, mais casos de borda).
+
+    python bench/bench_links.py
+
+Compara, âncora a âncora, a decisão de main.classificar_link + main.titulo_de_noticia com a da
+implementação anterior (normalize_link/limpar_link_google/is_probably_article, copiada abaixo
+como referência) e mede as duas: a nova a frio (cache vazio) e a quente (hrefs repetidos).
+"""
+import json
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS = os.path.join(RAIZ, "bench", "fixtures", "ancoras.json")
+sys.path.insert(0, RAIZ)
+
+from urllib.parse import urlparse, unquote, parse_qs  # noqa: E402
+
+import main  # noqa: E402
+
+# ---------------------------
+# Implementação anterior (referência)
+# ---------------------------
+def limpar_link_google(url: str) -> str:
+    try:
+        if not url: return url
+        parsed = urlparse(url)
+        qs = parse_qs(parsed.query)
+        if 'q' in qs and qs['q']: return qs['q'][0]
+        if '/url?q=' in url:
+            part = url.split('/url?q=', 1)[1]
+            real = part.split('&', 1)[0]
+            return unquote(real)
+        return url
+    except Exception: return url
+
+def normalize_link(link, prefer_domain=None):
+    if not link: return None
+    try:
+        if "/url?q=" in link: link = limpar_link_google(link)
+        if 'busca/click' in link or '/busca?' in link: return None
+        if link.startswith('/') and prefer_domain: link = prefer_domain.rstrip('/') + link
+        parsed = urlparse(link)
+        if not parsed.scheme:
+            link = 'https://' + link
+            parsed = urlparse(link)
+        if 'google.' in parsed.netloc and not ('news' in parsed.path or 'g1.globo.com' in link):
+            if '/url' in parsed.path and 'q=' in parsed.query:
+                link = limpar_link_google(link)
+                parsed = urlparse(link)
+            else: return None
+        clean = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+        return clean
+    except Exception: return None
+
+def extract_title_from_url(link):
+    try:
+        parsed = urlparse(link)
+        path = parsed.path or ''
+        if not path or path == '/': return parsed.netloc
+        segs = [s for s in path.split('/') if s]
+        last = segs[-1]
+        last = unquote(last)
+        last = last.split('.')[0]
+        title = last.replace('-', ' ').replace('_', ' ')
+        if len(title) < 3 or all(c.isdigit() for c in title): return parsed.netloc
+        return ' '.join([w.capitalize() for w in title.split()])
+    except Exception: return link
+
+def is_probably_article(title, link):
+    if not link: return False
+    try:
+        parsed = urlparse(link)
+        if not parsed.scheme or not parsed.netloc: return False
+        blacklist = ['facebook.com', 'twitter.com', 't.co', 'instagram.com', 'youtube.com', 'accounts.google.com', 'linkedin.com', 'bit.ly', 'tinyurl.com', 'meet.google.com']
+        net = parsed.netloc.lower()
+        if any(b in net for b in blacklist): return False
+        path = (parsed.path or '').strip('/')
+        if '/noticia/' in link or 'g1.globo.com' in parsed.netloc:
+            if len(path) < 3: return False
+        if any(x in link for x in ['busca', 'click', '/search', 'query=']): return False
+    except Exception: return False
+    if not title: return False
+    if title.startswith('http') or '=' in title or '%' in title:
+        derived = extract_title_from_url(link)
+        if not derived or len(derived) < 3: return False
+        title = derived
+    if '.' in title and ' ' not in title: return False
+    if len(title) < 6: return False
+    words = [w for w in title.split() if any(c.isalpha() for c in w)]
+    if len(words) < 2: return False
+    return True
+
+# ---------------------------
+# Comparação e medição
+# ---------------------------
+def decidir_antigo(ancora):
+    link = normalize_link(ancora["href"], ancora["dominio"])
+    if not link: return None, False
+    titulo = ancora["titulo"] or extract_title_from_url(link)
+    return link, is_probably_article(titulo, link)
+
+def decidir_novo(ancora):
+    link, aceito = main.classificar_link(ancora["href"], ancora["dominio"])
+    if not link: return None, False
+    titulo = ancora["titulo"] or main.extract_title_from_url(link)
+    return link, aceito and main.titulo_de_noticia(titulo, link)
+
+def limpar_caches():
+    main.classificar_link.cache_clear()
+    main.extract_title_from_url.cache_clear()
+    main.titulo_de_noticia.cache_clear()
+
+def cronometrar(decidir, corpus, repeticoes, antes=None):
+    total = 0.0
+    for _ in range(repeticoes):
+        if antes: antes()
+        inicio = time.perf_counter()
+        for ancora in corpus: decidir(ancora)
+        total += time.perf_counter() - inicio
+    return total / repeticoes / len(corpus) * 1e6
+
+def main_cli(repeticoes=200):
+    with open(CORPUS, encoding="utf-8") as f: corpus = json.load(f)
+    divergencias = 0
+    for ancora in corpus:
+        antigo = decidir_antigo(ancora) + (limpar_link_google(ancora["href"]),)
+        novo = decidir_novo(ancora) + (main.desembrulhar_google(ancora["href"]),)
+        if antigo != novo:
+            divergencias += 1
+            print(f"❌ {ancora['href']!r} ({ancora['titulo']!r}): antes {antigo}, agora {novo}")
+    aceitas = sum(1 for a in corpus if decidir_novo(a)[1])
+    if not divergencias: print(f"✅ mesmas decisões nas {len(corpus)} âncoras ({aceitas} aceitas, {len(corpus) - aceitas} recusadas)")
+    antes = cronometrar(decidir_antigo, corpus, repeticoes)
+    frio = cronometrar(decidir_novo, corpus, repeticoes, antes=limpar_caches)
+    quente = cronometrar(decidir_novo, corpus, repeticoes)
+    print(f"anterior: {antes:.2f} µs/âncora | novo a frio: {frio:.2f} µs ({antes / frio:.1f}x) | novo a quente: {quente:.2f} µs ({antes / quente:.1f}x)")
+    return 1 if divergencias else 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,344 @@
+"""
+Benchmark/teste de carga offline da busca: nada de G1, Google, tradutor ou MySQL de verdade.
+
+    python bench/carga.py                                   # todos os cenários, configuração padrão
+    python bench/carga.py --cenarios index,api --concorrencia 16 --requisicoes 400
+    python bench/carga.py --latencia 80 --falhas 0.05 --latencia-traducao 150
+    python bench/carga.py --comparar --gravar               # compara com a última rodada igual e registra esta
+
+Um processo à parte serve as páginas de bench/fixtures no lugar do G1 e do Google, com latência
+e taxa de falha configuráveis; o GoogleTranslator vira um tradutor falso (devolve o texto, com
+latência) e o MySQL um banco em memória que só conta os comandos. Com isso cada cenário roda
+na concorrência pedida:
+
+    raspagem    raspar_g1_requests + raspar_google_requests
+    sentimento  analisar_sentimentos de um lote de títulos inéditos
+    busca       executar_busca completa (fan-out, agrupamento, sentimento, gravação)
+    index       POST / pelo cliente de teste do Flask
+    api         GET /api/search (primeira página e seguintes)
+
+Para cada cenário sai vazão, p50/p95/p99, CPU por requisição e pico de memória alocada (este
+numa rodada curta à parte, sob tracemalloc, para não distorcer a latência). --gravar acrescenta
+o resultado em bench/historico_carga.jsonl; --comparar aponta as piores que --tolerancia em
+relação à última rodada gravada com a mesma configuração e sai com código 1.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(RAIZ, "bench", "fixtures")
+HISTORICO = os.path.join(RAIZ, "bench", "historico_carga.jsonl")
+PAGINAS = {"g1.globo.com": "g1_busca.html", "www.google.com": "google_noticias.html"}
+CENARIOS = ["raspagem", "sentimento", "busca", "index", "api"]
+sys.path.insert(0, RAIZ)
+
+# Antes de importar o app: sem limite de taxa nas fontes (o alvo é o nosso código, não o disjuntor)
+# e gravação ligada, para o banco falso ver o mesmo tráfego da produção.
+os.environ.setdefault("FONTE_TAXA", "0")
+os.environ.setdefault("SAVE_TO_DB", "1")
+os.environ.setdefault("LOG_NIVEL", "WARNING")  # os logs de cada raspagem atrapalhariam o relatório
+
+import main  # noqa: E402
+
+# ---------------------------
+# Servidor HTTP falso (processo à parte, para a CPU dele não entrar na conta)
+# ---------------------------
+def _servir(latencia, falhas, semente, porta_saida):
+    paginas = {}
+    for host, arquivo in PAGINAS.items():
+        with open(os.path.join(FIXTURES, arquivo), "rb") as f: paginas[host] = f.read()
+    sorteio = random.Random(semente)
+
+    class Replay(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, como as sessões do app esperam
+
+        def do_GET(self):
+            host = self.path.lstrip("/").split("/", 1)[0]
+            if latencia: time.sleep(latencia * sorteio.uniform(0.5, 1.5))
+            corpo, status = paginas.get(host), 200
+            if corpo is None: corpo, status = b"nao gravado", 404
+            elif sorteio.random() < falhas: corpo, status = b"falha simulada", 503
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args): pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Replay)
+    servidor.daemon_threads = True
+    porta_saida.send(servidor.server_address[1])
+    servidor.serve_forever()
+
+def subir_servidor(latencia, falhas, semente):
+    recebe, envia = multiprocessing.Pipe(duplex=False)
+    processo = multiprocessing.Process(target=_servir, args=(latencia, falhas, semente, envia), daemon=True)
+    processo.start()
+    return processo, recebe.recv()
+
+# ---------------------------
+# Tradutor e banco falsos
+# ---------------------------
+class TradutorFalso:
+    """No lugar do GoogleTranslator (main._tradutor): devolve o texto como veio, depois da latência configurada."""
+    latencia = 0.0
+    chamadas = 0
+
+    def __init__(self, source="auto", target="en"): pass
+
+    def translate(self, texto):
+        TradutorFalso.chamadas += 1
+        if self.latencia: time.sleep(self.latencia)
+        return texto
+
+class CursorFalso:
+    def __init__(self, banco):
+        self.banco = banco
+        self._linhas = []
+
+    def __enter__(self): return self
+    def __exit__(self, *args): pass
+
+    def execute(self, sql, params=None):
+        self.banco.contar(sql.split(None, 1)[0].upper())
+        comando = " ".join(sql.split())
+        if "FROM schema_migrations" in comando: self._linhas = [(v,) for v, _, _ in main.MIGRACOES]
+        elif comando.startswith("SELECT CURDATE()"): self._linhas = [(datetime.date.today(),)]
+        elif comando.startswith("SELECT GET_LOCK"): self._linhas = [(1,)]
+        else: self._linhas = []
+
+    def executemany(self, sql, linhas):
+        self.banco.contar(sql.split(None, 1)[0].upper(), len(linhas))
+
+    def fetchall(self): return list(self._linhas)
+    def fetchone(self): return self._linhas[0] if self._linhas else None
+
+class ConexaoFalsa:
+    def __init__(self, banco): self.banco, self.open = banco, True
+    def cursor(self): return CursorFalso(self.banco)
+    def ping(self, reconnect=False): pass
+    def begin(self): self.banco.contar("BEGIN")
+    def commit(self): self.banco.contar("COMMIT")
+    def rollback(self): self.banco.contar("ROLLBACK")
+    def close(self): self.open = False
+
+class BancoFalso:
+    """Stand-in do MySQL: aceita qualquer comando com `latencia` por ida ao banco e só conta linhas por tipo."""
+    def __init__(self, latencia):
+        self.latencia = latencia
+        self.comandos = {}
+        self._lock = threading.Lock()
+
+    def contar(self, tipo, linhas=1):
+        if self.latencia: time.sleep(self.latencia)
+        with self._lock: self.comandos[tipo] = self.comandos.get(tipo, 0) + linhas
+
+    def conectar(self): return ConexaoFalsa(self)
+
+def instalar_falsos(porta, args):
+    """Aponta o app para o servidor falso, o tradutor falso e o banco falso."""
+    http_get_original = main.http_get
+
+    def http_get(url, headers=None, timeout=10):
+        partes = main.urlsplit(url)
+        local = f"http://127.0.0.1:{porta}/{partes.netloc}{partes.path}" + (f"?{partes.query}" if partes.query else "")
+        return http_get_original(local, headers=headers, timeout=timeout)
+
+    main.http_get = http_get
+    # O "navegador" do fallback lê a mesma página gravada, sem Chrome.
+    main.renderizar_pagina = lambda url, seletores, espera=None: http_get(url)
+    TradutorFalso.latencia = args.latencia_traducao / 1000
+    main._tradutor = TradutorFalso
+    banco = BancoFalso(args.latencia_banco / 1000)
+    main.conectar_banco = banco.conectar
+    return banco
+
+# ---------------------------
+# Cenários
+# ---------------------------
+def _titulos():
+    with open(os.path.join(FIXTURES, "esperado_extracao.json"), encoding="utf-8") as f: esperado = json.load(f)
+    return sorted({item["titulo"] for pagina in esperado.values() for itens in pagina.values() for item in itens})
+
+def montar_cenarios(args):
+    titulos = _titulos()
+    termo = lambda i: f"economia {i % args.termos}"
+    clientes = threading.local()
+
+    def cliente():
+        # Um cliente de teste por thread, já logado e com onboarding feito (sem ida ao banco).
+        if not hasattr(clientes, "c"):
+            clientes.c = main.app.test_client()
+            with clientes.c.session_transaction() as s:
+                s.update({"user_id": 1, "user_name": "carga", "fez_onboarding": True, "resultados": 12, "tema": "claro"})
+        return clientes.c
+
+    def raspagem(i):
+        return main.raspar_g1_requests(termo(i), limite=12) + main.raspar_google_requests(termo(i), limite=12)
+
+    def sentimento(i):
+        # Títulos inéditos a cada chamada: mede tradução + TextBlob, não o cache de polaridade.
+        return main.analisar_sentimentos([f"{t} #{i}" for t in titulos[: args.lote]])
+
+    def busca(i):
+        return main.executar_busca(termo(i))
+
+    def index(i):
+        resp = cliente().post("/", data={"termo": termo(i)})
+        if resp.status_code >= 400: raise RuntimeError(f"index respondeu {resp.status_code}")
+
+    def api(i):
+        resp = cliente().get(f"/api/search?termo={main.quote_plus(termo(i))}&page={1 + i % 3}&per_page=6")
+        if resp.status_code >= 400: raise RuntimeError(f"/api/search respondeu {resp.status_code}")
+
+    return {"raspagem": raspagem, "sentimento": sentimento, "busca": busca, "index": index, "api": api}
+
+def limpar_caches():
+    main._cache_resultados._dados.clear()
+    main._cache_polaridade._dados.clear()
+
+def percentil(valores, q):
+    return valores[min(len(valores) - 1, int(round(q * (len(valores) - 1))))]
+
+def rodar_cenario(funcao, requisicoes, concorrencia):
+    latencias, erros = [], 0
+    lock = threading.Lock()
+
+    def uma(i):
+        nonlocal erros
+        inicio = time.perf_counter()
+        try: funcao(i)
+        except Exception:
+            with lock: erros += 1
+        with lock: latencias.append(time.perf_counter() - inicio)
+
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_inicio = uso.ru_utime + uso.ru_stime
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor: list(executor.map(uma, range(requisicoes)))
+    duracao = time.perf_counter() - inicio
+    uso = resource.getrusage(resource.RUSAGE_SELF)
+    latencias.sort()
+    return {
+        "requisicoes": requisicoes, "erros": erros, "vazao": round(requisicoes / duracao, 2),
+        "p50_ms": round(percentil(latencias, 0.50) * 1000, 2),
+        "p95_ms": round(percentil(latencias, 0.95) * 1000, 2),
+        "p99_ms": round(percentil(latencias, 0.99) * 1000, 2),
+        "cpu_ms": round((uso.ru_utime + uso.ru_stime - cpu_inicio) / requisicoes * 1000, 3),
+    }
+
+def medir_memoria(funcao, requisicoes, concorrencia):
+    tracemalloc.start()
+    try:
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor: list(executor.map(funcao, range(requisicoes)))
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+# ---------------------------
+# Histórico e comparação
+# ---------------------------
+def _commit():
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, timeout=5).stdout.strip()
+    except Exception: return ""
+
+def ultima_rodada(config):
+    if not os.path.exists(HISTORICO): return None
+    anterior = None
+    with open(HISTORICO, encoding="utf-8") as f:
+        for linha in f:
+            registro = json.loads(linha)
+            if registro.get("config") == config: anterior = registro
+    return anterior
+
+def comparar(atual, anterior, tolerancia):
+    """Lista (cenário, métrica, antes, agora) do que piorou além da tolerância."""
+    pioras = []
+    for cenario, agora in atual["cenarios"].items():
+        antes = anterior["cenarios"].get(cenario)
+        if not antes: continue
+        for metrica in ("p50_ms", "p95_ms", "p99_ms", "cpu_ms", "memoria_kib"):
+            if antes.get(metrica) and agora.get(metrica, 0) > antes[metrica] * (1 + tolerancia):
+                pioras.append((cenario, metrica, antes[metrica], agora[metrica]))
+        if antes.get("vazao") and agora["vazao"] < antes["vazao"] * (1 - tolerancia):
+            pioras.append((cenario, "vazao", antes["vazao"], agora["vazao"]))
+    return pioras
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark offline da busca (servidor, tradutor e banco falsos).")
+    parser.add_argument("--cenarios", default=",".join(CENARIOS), help="separados por vírgula: " + ", ".join(CENARIOS))
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--requisicoes", type=int, default=100, help="por cenário")
+    parser.add_argument("--termos", type=int, default=1000, help="termos distintos; menos termos = mais acertos de cache")
+    parser.add_argument("--lote", type=int, default=20, help="títulos por chamada no cenário sentimento")
+    parser.add_argument("--latencia", type=float, default=50, help="ms por resposta do servidor falso (±50%%)")
+    parser.add_argument("--falhas", type=float, default=0.0, help="fração de respostas 503 do servidor falso")
+    parser.add_argument("--latencia-traducao", type=float, default=100, help="ms por chamada ao tradutor falso")
+    parser.add_argument("--latencia-banco", type=float, default=2, help="ms por comando no banco falso")
+    parser.add_argument("--memoria", type=int, default=20, help="requisições da rodada sob tracemalloc (0 desliga)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--gravar", action="store_true", help="acrescenta o resultado em " + os.path.relpath(HISTORICO, RAIZ))
+    parser.add_argument("--comparar", action="store_true", help="compara com a última rodada gravada de mesma configuração")
+    parser.add_argument("--tolerancia", type=float, default=0.15, help="piora relativa aceita no --comparar")
+    args = parser.parse_args()
+
+    nomes = [c.strip() for c in args.cenarios.split(",") if c.strip()]
+    desconhecidos = [c for c in nomes if c not in CENARIOS]
+    if desconhecidos: parser.error("cenário desconhecido: " + ", ".join(desconhecidos))
+    random.seed(args.semente)
+    servidor, porta = subir_servidor(args.latencia / 1000, args.falhas, args.semente)
+    banco = instalar_falsos(porta, args)
+    cenarios = montar_cenarios(args)
+    config = {k: v for k, v in vars(args).items() if k not in ("cenarios", "gravar", "comparar", "tolerancia")}
+    resultado = {"data": datetime.datetime.now().isoformat(timespec="seconds"), "commit": _commit(), "config": config, "cenarios": {}}
+    try:
+        for nome in nomes:
+            limpar_caches()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i in range(min(5, args.requisicoes)):  # aquecimento, fora da conta
+                    try: cenarios[nome](-1 - i)
+                    except Exception: pass  # com --falhas a raspagem pode falhar; a rodada medida conta os erros
+                limpar_caches()
+                medidas = rodar_cenario(cenarios[nome], args.requisicoes, args.concorrencia)
+                if args.memoria:
+                    limpar_caches()
+                    medidas["memoria_kib"] = medir_memoria(cenarios[nome], args.memoria, args.concorrencia)
+            resultado["cenarios"][nome] = medidas
+            print(f"{nome:<11} {medidas['vazao']:>8.1f} req/s  p50 {medidas['p50_ms']:>8.1f} ms  p95 {medidas['p95_ms']:>8.1f} ms  "
+                  f"p99 {medidas['p99_ms']:>8.1f} ms  CPU {medidas['cpu_ms']:>7.2f} ms/req  "
+                  f"mem {medidas.get('memoria_kib', 0):>8.0f} KiB  erros {medidas['erros']}")
+    finally:
+        servidor.terminate()
+    print(f"tradutor: {TradutorFalso.chamadas} chamadas | banco: " + ", ".join(f"{k}={v}" for k, v in sorted(banco.comandos.items())))
+
+    codigo = 0
+    if args.comparar:
+        anterior = ultima_rodada(config)
+        if anterior is None: print("sem rodada anterior com a mesma configuração para comparar")
+        else:
+            pioras = comparar(resultado, anterior, args.tolerancia)
+            for cenario, metrica, antes, agora in pioras: print(f"❌ {cenario}/{metrica}: {antes} → {agora} (commit anterior {anterior.get('commit') or '?'})")
+            if not pioras: print(f"✅ nada piorou mais que {args.tolerancia:.0%} desde {anterior['data']} ({anterior.get('commit') or '?'})")
+            codigo = 1 if pioras else 0
+    if args.gravar:
+        with open(HISTORICO, "a", encoding="utf-8") as f: f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+        print("rodada gravada em", os.path.relpath(HISTORICO, RAIZ))
+    return codigo
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,85 @@
+"""
+Confere a extração de G1 e Google Notícias contra as páginas salvas em bench/fixtures.
+
+    python bench/check_extracao.py           # compara com esperado_extracao.json
+    python bench/check_extracao.py --gravar  # regrava o esperado (só quando a mudança for intencional)
+
+Cada fixture passa pelas quatro raspagens (requests e fallback do navegador de cada fonte),
+com http_get/renderizar_pagina trocados por leitura do arquivo. Também mede tempo e pico de memória.
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(RAIZ, "bench", "fixtures")
+ESPERADO = os.path.join(FIXTURES, "esperado_extracao.json")
+PAGINAS = ["g1_busca", "google_noticias", "google_noticias_dbsr", "google_noticias_basico"]
+sys.path.insert(0, RAIZ)
+
+import main  # noqa: E402
+
+def ler(nome):
+    with open(os.path.join(FIXTURES, nome + ".html"), encoding="utf-8") as f: return f.read()
+
+def extrair_tudo():
+    saida = {}
+    originais = (main.http_get, main.renderizar_pagina, main.raspar_g1_requests, main.raspar_google_requests)
+    try:
+        for nome in PAGINAS:
+            html = ler(nome)
+            main.http_get = lambda url, headers=None, timeout=10: html
+            main.renderizar_pagina = lambda url, seletores, espera=None: html
+            r = {"g1_requests": originais[2]("economia", limite=100), "google_requests": originais[3]("economia", limite=100)}
+            main.raspar_g1_requests = lambda termo, limite=20: []
+            main.raspar_google_requests = lambda termo, limite=12: []
+            r["g1_navegador"] = main.raspar_g1("economia")
+            r["google_navegador"] = main.raspar_google_noticias("economia")
+            main.raspar_g1_requests, main.raspar_google_requests = originais[2], originais[3]
+            saida[nome] = r
+    finally:
+        main.http_get, main.renderizar_pagina, main.raspar_g1_requests, main.raspar_google_requests = originais
+    return saida
+
+def medir(repeticoes=50):
+    g1, google = ler("g1_busca"), ler("google_noticias")
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        main.extrair(g1, main.ESPEC_G1)
+        main.extrair(google, main.ESPEC_GOOGLE)
+    ms = (time.perf_counter() - inicio) / repeticoes * 1000
+    tracemalloc.start()
+    main.extrair(g1, main.ESPEC_G1)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"extração: {ms:.2f} ms por par de páginas (G1 + Google), pico de memória no G1 {pico / 1024:.0f} KiB")
+
+def main_cli():
+    with contextlib.redirect_stdout(io.StringIO()): atual = extrair_tudo()
+    if "--gravar" in sys.argv:
+        with open(ESPERADO, "w", encoding="utf-8") as f: json.dump(atual, f, ensure_ascii=False, indent=1)
+        print("esperado regravado:", ESPERADO)
+        return 0
+    with open(ESPERADO, encoding="utf-8") as f: esperado = json.load(f)
+    falhas = 0
+    for pagina, por_raspagem in esperado.items():
+        for raspagem, itens in por_raspagem.items():
+            obtido = atual[pagina][raspagem]
+            if obtido != itens:
+                falhas += 1
+                print(f"❌ {pagina}/{raspagem}: esperado {len(itens)} itens, obtido {len(obtido)}")
+                for a, b in zip(itens, obtido):
+                    if a != b:
+                        print("   esperado:", a)
+                        print("   obtido:  ", b)
+                        break
+    if not falhas: print(f"✅ extração idêntica nas {len(esperado)} páginas salvas")
+    medir()
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
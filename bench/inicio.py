@@ -0,0 +1,65 @@
+"""
+Custo de subir um processo do app: import de main.py, aquecimento e primeira busca, a frio e aquecido.
+
+    python bench/inicio.py                 # 5 processos novos por modo
+    python bench/inicio.py --repeticoes 10
+
+Cada medida roda num processo Python novo (import nunca vem de cache do próprio processo). A "primeira
+busca" é uma raspagem + sentimento de bench/fixtures com o tradutor trocado por um falso, então mede o
+custo local (imports adiados, léxico do TextBlob, parser) e não a rede.
+  frio      importa main e faz a primeira busca (o que um worker sem --preload pagava na 1ª requisição)
+  aquecido  importa main, roda aquecer_processo() e faz a primeira busca (worker com --preload/post_worker_init)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FILHO = r"""
+import json, os, sys, time
+sys.path.insert(0, sys.argv[1])
+os.environ["LOG_NIVEL"] = "WARNING"
+inicio = time.perf_counter()
+import main
+importado = time.perf_counter() - inicio
+aquecimento = 0.0
+if sys.argv[2] == "aquecido":
+    t = time.perf_counter()
+    main.aquecer_processo()
+    aquecimento = time.perf_counter() - t
+
+class Tradutor:
+    def translate(self, texto): return texto
+
+main._tradutor = Tradutor
+with open(os.path.join(sys.argv[1], "bench", "fixtures", "g1_busca.html"), encoding="utf-8") as f: html = f.read()
+main.http_get = lambda url, headers=None, timeout=10: html
+t = time.perf_counter()
+itens = main.raspar_g1_requests("economia", limite=12)
+main.analisar_sentimentos([i["titulo"] for i in itens])
+busca = time.perf_counter() - t
+print(json.dumps({"import": importado, "aquecimento": aquecimento, "primeira_busca": busca,
+                  "rss_kib": main.memoria_processo().get("rss", 0) // 1024}))
+"""
+
+def medir(modo):
+    saida = subprocess.run([sys.executable, "-c", FILHO, RAIZ, modo], capture_output=True, text=True, check=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Import, aquecimento e primeira busca de um processo novo.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'modo':<10} {'import':>10} {'aquecimento':>12} {'1ª busca':>10} {'RSS':>10}   (medianas de {args.repeticoes} processos)")
+    for modo in ("frio", "aquecido"):
+        medidas = [medir(modo) for _ in range(args.repeticoes)]
+        mediana = {k: statistics.median(m[k] for m in medidas) for k in medidas[0]}
+        print(f"{modo:<10} {mediana['import'] * 1000:>8.0f}ms {mediana['aquecimento'] * 1000:>10.0f}ms "
+              f"{mediana['primeira_busca'] * 1000:>8.0f}ms {mediana['rss_kib'] / 1024:>7.1f}MiB")
+
+if __name__ == "__main__":
+    main_cli()
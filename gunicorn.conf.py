@@ -0,0 +1,24 @@
+"""
+Configuração do gunicorn (Procfile: gunicorn --config gunicorn.conf.py ... main:app).
+
+Com preload o master importa main.py e roda aquecer_processo() uma vez, antes do fork: os workers já
+nascem com textblob, requests, pymysql e o léxico carregados, em páginas compartilhadas (copy-on-write),
+e sobem sem pagar import nem aquecimento. Conexões, sessões HTTP e pools de threads são criados por
+processo, no primeiro uso, então nada disso atravessa o fork.
+GUNICORN_PRELOAD=0 volta ao modo sem preload: cada worker importa e aquece antes de aceitar requisições.
+"""
+import gc
+import os
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+def when_ready(server):
+    if not preload_app: return
+    import main
+    main.aquecer_processo()
+    # Tira do GC o que já existe: sem isso cada coleta nos workers escreve nesses objetos e copia as páginas.
+    gc.freeze()
+
+def post_worker_init(worker):
+    import main
+    main.aquecer_processo()  # com preload já veio aquecido do master e não faz nada
@@ -1,27 +1,278 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+import time
+_inicio_import = time.perf_counter()  # medido até o fim do módulo: noticias_inicio_segundos{fase="import"}
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context, g
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
+import sys
 import math
-import requests
-from bs4 import BeautifulSoup
-from textblob import TextBlob
-from deep_translator import GoogleTranslator
-import pymysql
-import traceback
-import time
-from urllib.parse import quote_plus, urlparse, unquote, parse_qs, urljoin
+import random
+import signal
+import importlib
+import logging
+import contextvars
+import atexit
+import json
+import hashlib
+import bisect
+import sqlite3
+import re
+import unicodedata
+import threading
+import uuid
+import queue
+from contextlib import contextmanager
+from functools import lru_cache
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from html.parser import HTMLParser
+from urllib.parse import quote_plus, urlparse, urlsplit, unquote, parse_qs, urljoin
 
 # Flask app
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "chave_secreta_padrao_troque_isso")
 
+# ---------------------------
+# Observabilidade (logs estruturados, métricas e trace por requisição)
+# ---------------------------
+LOG_NIVEL = os.getenv("LOG_NIVEL", "INFO").upper()
+LOG_FORMATO = os.getenv("LOG_FORMATO", "json")        # json (uma linha por evento) ou texto
+METRICAS_TOKEN = os.getenv("METRICAS_TOKEN", "")      # definido: /metrics exige "Authorization: Bearer <token>"
+_trace_atual = contextvars.ContextVar("trace", default=None)
+_RE_TRACE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+class FormatadorLog(logging.Formatter):
+    """Uma linha por evento: JSON com ts, nivel, evento, trace e os campos; em LOG_FORMATO=texto, chave=valor."""
+    def format(self, registro):
+        dados = {"ts": round(registro.created, 3), "nivel": registro.levelname, "evento": registro.getMessage(),
+                 "trace": getattr(registro, "trace", None), **getattr(registro, "campos", {})}
+        if registro.exc_info: dados["detalhe"] = self.formatException(registro.exc_info)
+        if LOG_FORMATO == "texto":
+            return " ".join([dados.pop("nivel"), dados.pop("evento")] + [f"{k}={v}" for k, v in dados.items() if k != "ts" and v is not None])
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+log = logging.getLogger("noticias")
+if not log.handlers:
+    _saida_log = logging.StreamHandler(sys.stdout)
+    _saida_log.setFormatter(FormatadorLog())
+    log.addHandler(_saida_log)
+    log.setLevel(LOG_NIVEL)
+    log.propagate = False
+
+def registrar(evento, nivel=logging.INFO, **campos):
+    """Log estruturado: `evento` é um nome fixo (ex.: "raspagem"), o resto vai como campos."""
+    log.log(nivel, evento, extra={"campos": campos, "trace": _trace_atual.get()})
+
+def registrar_erro(evento, erro, detalhe=False, **campos):
+    """Como registrar(), em nível ERROR, com a mensagem do erro e, se `detalhe`, o traceback."""
+    log.error(evento, exc_info=detalhe, extra={"campos": {**campos, "erro": str(erro)}, "trace": _trace_atual.get()})
+
+def novo_trace():
+    return uuid.uuid4().hex[:16]
+
+_METRICAS = []
+
+def _valor_rotulo(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+def _rotulos_prometheus(nomes, valores, extra=""):
+    pares = [f'{n}="{_valor_rotulo(v)}"' for n, v in zip(nomes, valores)]
+    if extra: pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+class Contador:
+    """Contador monotônico com rótulos, no formato do Prometheus. Por processo."""
+    tipo = "counter"
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+        _METRICAS.append(self)
+
+    def inc(self, valor=1, **rotulos):
+        chave = tuple(str(rotulos.get(r, "")) for r in self.rotulos)
+        with self._lock: self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def exportar(self):
+        with self._lock: valores = sorted(self._valores.items())
+        for chave, valor in valores: yield f"{self.nome}{_rotulos_prometheus(self.rotulos, chave)} {valor}"
+
+class Medida(Contador):
+    """Valor instantâneo (gauge) com rótulos: o último definido é o que sai."""
+    tipo = "gauge"
+
+    def definir(self, valor, **rotulos):
+        chave = tuple(str(rotulos.get(r, "")) for r in self.rotulos)
+        with self._lock: self._valores[chave] = valor
+
+class Histograma:
+    """Histograma de latência (segundos) com rótulos e baldes fixos, no formato do Prometheus. Por processo."""
+    tipo = "histogram"
+    BALDES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self, nome, ajuda, rotulos=(), baldes=BALDES):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.baldes = tuple(baldes)
+        self._valores = {}  # rótulos -> [contagem por balde..., acima do último, soma]
+        self._lock = threading.Lock()
+        _METRICAS.append(self)
+
+    def observar(self, segundos, **rotulos):
+        chave = tuple(str(rotulos.get(r, "")) for r in self.rotulos)
+        i = bisect.bisect_left(self.baldes, segundos)
+        with self._lock:
+            linha = self._valores.get(chave)
+            if linha is None: linha = self._valores[chave] = [0] * (len(self.baldes) + 1) + [0.0]
+            linha[i] += 1
+            linha[-1] += segundos
+
+    @contextmanager
+    def medir(self, **rotulos):
+        inicio = time.perf_counter()
+        try: yield
+        finally: self.observar(time.perf_counter() - inicio, **rotulos)
+
+    def exportar(self):
+        with self._lock: valores = sorted((k, list(v)) for k, v in self._valores.items())
+        for chave, linha in valores:
+            acumulado = 0
+            for limite, contagem in zip(self.baldes + (float("inf"),), linha):
+                acumulado += contagem
+                le = "+Inf" if limite == float("inf") else f"{limite:g}"
+                balde = f'le="{le}"'
+                yield f"{self.nome}_bucket{_rotulos_prometheus(self.rotulos, chave, balde)} {acumulado}"
+            yield f"{self.nome}_sum{_rotulos_prometheus(self.rotulos, chave)} {round(linha[-1], 6)}"
+            yield f"{self.nome}_count{_rotulos_prometheus(self.rotulos, chave)} {acumulado}"
+
+def exportar_metricas():
+    linhas = []
+    for m in _METRICAS:
+        linhas += [f"# HELP {m.nome} {m.ajuda}", f"# TYPE {m.nome} {m.tipo}"]
+        linhas.extend(m.exportar())
+    return "\n".join(linhas) + "\n"
+
+ETAPA_SEGUNDOS = Histograma("noticias_etapa_segundos", "Duração de cada etapa da busca: upstream, parse, links, traducao, sentimento, banco_conexao, banco_gravacao, render, busca.", ("etapa",))
+FONTE_SEGUNDOS = Histograma("noticias_fonte_segundos", "Duração de cada fonte numa busca, por estado final.", ("fonte", "estado"))
+REQUISICAO_SEGUNDOS = Histograma("noticias_requisicao_segundos", "Duração das requisições HTTP por rota.", ("rota", "metodo", "status"))
+UPSTREAM_TOTAL = Contador("noticias_upstream_respostas_total", "Respostas das fontes por host e status (304 = GET condicional reaproveitado).", ("host", "status"))
+CACHE_TOTAL = Contador("noticias_cache_total", "Consultas aos caches: resultado acerto, velho (stale) ou falha.", ("cache", "resultado"))
+FALLBACK_TOTAL = Contador("noticias_fallback_navegador_total", "Buscas que caíram para o navegador headless, por resultado.", ("fonte", "resultado"))
+FONTE_FALHAS_TOTAL = Contador("noticias_fonte_falhas_total", "Fontes sem resultado numa busca: erro, timeout, pulada, limitada ou ocupada.", ("fonte", "estado"))
+INICIO_SEGUNDOS = Medida("noticias_inicio_segundos", "Custo de subir o processo: import de main.py e aquecimento (com --preload, pagos uma vez no master).", ("fase",))
+IMPORT_SEGUNDOS = Medida("noticias_import_tardio_segundos", "Quanto custou cada módulo pesado, importado no primeiro uso.", ("modulo",))
+PRIMEIRA_REQUISICAO_SEGUNDOS = Medida("noticias_primeira_requisicao_segundos", "Duração da primeira requisição de cada rota neste processo.", ("rota",))
+MEMORIA_BYTES = Medida("noticias_memoria_bytes", "Memória do processo na coleta: rss, pss (RSS rateado entre processos que dividem a página) e privada.", ("tipo",))
+DISJUNTOR_ESTADO = Medida("noticias_fonte_disjuntor", "Estado do disjuntor de cada fonte: 1 no estado atual (fechado, meio-aberto ou aberto), 0 nos outros.", ("fonte", "estado"))
+_rotas_atendidas = set()
+_rotas_atendidas_pid = None
+
+@app.before_request
+def _iniciar_trace():
+    # Reaproveita o X-Request-ID do proxy quando vier um válido; senão gera um.
+    trace = request.headers.get("X-Request-ID", "")
+    _trace_atual.set(trace if _RE_TRACE.match(trace) else novo_trace())
+    g.inicio_requisicao = time.perf_counter()
+
+@app.after_request
+def _fechar_trace(resposta):
+    resposta.headers["X-Request-ID"] = _trace_atual.get() or ""
+    if "inicio_requisicao" in g:
+        global _rotas_atendidas_pid
+        rota = request.url_rule.rule if request.url_rule else "sem_rota"
+        duracao = time.perf_counter() - g.inicio_requisicao
+        REQUISICAO_SEGUNDOS.observar(duracao, rota=rota, metodo=request.method, status=resposta.status_code)
+        if _rotas_atendidas_pid != os.getpid(): _rotas_atendidas.clear(); _rotas_atendidas_pid = os.getpid()
+        if rota not in _rotas_atendidas:
+            _rotas_atendidas.add(rota)
+            PRIMEIRA_REQUISICAO_SEGUNDOS.definir(round(duracao, 6), rota=rota)
+            registrar("primeira_requisicao", rota=rota, segundos=round(duracao, 3), aquecido=_aquecido)
+    return resposta
+
+@app.teardown_request
+def _limpar_trace(_erro=None):
+    _trace_atual.set(None)  # a thread do gunicorn volta para o pool sem o trace desta requisição
+
+def renderizar(template, **contexto):
+    with ETAPA_SEGUNDOS.medir(etapa="render"): return render_template(template, **contexto)
+
+# ---------------------------
+# Inicialização (imports adiados e pré-aquecimento)
+# ---------------------------
+# textblob, deep_translator, requests e pymysql somam boa parte do import de main.py, e o TextBlob ainda
+# lê o léxico na primeira análise. Eles entram por importar(), no primeiro uso. Com o gunicorn em
+# --preload (gunicorn.conf.py), aquecer_processo() roda no master antes do fork e os workers herdam
+# módulos e léxico já carregados, em páginas compartilhadas (copy-on-write).
+MODULOS_PESADOS = ("requests", "urllib3.util.retry", "pymysql", "deep_translator", "textblob")
+_aquecido = False
+_aquecimento_lock = threading.Lock()
+
+def importar(modulo, atributo=None):
+    """Importa `modulo` (e devolve o `atributo` dele, se pedido); a primeira vez no processo fica medida."""
+    novo = modulo not in sys.modules
+    inicio = time.perf_counter()
+    mod = importlib.import_module(modulo)
+    if novo: IMPORT_SEGUNDOS.definir(round(time.perf_counter() - inicio, 6), modulo=modulo)
+    return getattr(mod, atributo) if atributo else mod
+
+def falha_http(erro):
+    """`erro` é um requests.RequestException? Sem requests importado, nenhum erro pode ser."""
+    requests = sys.modules.get("requests")
+    return requests is not None and isinstance(erro, requests.RequestException)
+
+def aquecer_processo():
+    """
+    Importa os módulos pesados e aquece o léxico do TextBlob, o parser de HTML e o sentimento offline,
+    uma vez por processo. Não abre conexão, sessão HTTP nem thread: é seguro antes do fork.
+    """
+    global _aquecido
+    with _aquecimento_lock:
+        if _aquecido: return
+        inicio = time.perf_counter()
+        for modulo in MODULOS_PESADOS: importar(modulo)
+        if not SENTIMENTO_OFFLINE: importar("textblob", "TextBlob")("good news").sentiment  # carrega o léxico
+        _polaridade_offline("bom dia")
+        # Direto no parser (sem extrair()) para o aquecimento não entrar nas métricas de parse.
+        html = '<div class="dbsr"><a href="/url?q=https://g1.globo.com/noticia/a.ghtml"><h3>Título</h3></a></div>'
+        for espec in (ESPEC_G1, ESPEC_G1_NAVEGADOR, ESPEC_GOOGLE, ESPEC_GOOGLE_NAVEGADOR):
+            parser = _ParserExtracao(espec)
+            parser.feed(html)
+            parser.close()
+        segundos = time.perf_counter() - inicio
+        _aquecido = True
+    INICIO_SEGUNDOS.definir(round(segundos, 6), fase="aquecimento")
+    registrar("aquecimento", segundos=round(segundos, 3), pid=os.getpid())
+
+def memoria_processo():
+    """{"rss", "pss", "privada"} em bytes, de /proc/self/smaps_rollup (Linux); vazio se não existir."""
+    campos = {"Rss:": "rss", "Pss:": "pss", "Private_Clean:": "privada", "Private_Dirty:": "privada"}
+    memoria = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for linha in f:
+                partes = linha.split()
+                if partes and partes[0] in campos: memoria[campos[partes[0]]] = memoria.get(campos[partes[0]], 0) + int(partes[1]) * 1024
+    except (OSError, ValueError): pass
+    return memoria
+
 # ---------------------------
 # Banco de dados (CORRIGIDO PARA RAILWAY)
 # ---------------------------
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))      # espera máxima por uma conexão livre
+DB_POOL_RECYCLE = float(os.getenv("DB_POOL_RECYCLE", "60"))     # ociosa há mais que isso: faz ping antes de usar
+DB_POOL_MAX_AGE = float(os.getenv("DB_POOL_MAX_AGE", "3600"))   # conexão mais velha que isso é fechada e refeita
+_diagnostico_banco_feito = False
+
 def conectar_banco():
     """
     Conecta ao MySQL priorizando as Variáveis de Ambiente do Railway.
+    Abre sempre uma conexão nova; as rotas usam obter_conexao(), que reaproveita as do pool.
     """
+    global _diagnostico_banco_feito
     # 1. Tenta pegar as configurações do Railway (Variáveis de Ambiente)
     host = os.getenv('DB_HOST')
     user = os.getenv('DB_USER')
@@ -36,69 +287,182 @@ def conectar_banco():
         port = 3306
 
     # 2. Diagnóstico no Log (Para você ver se o Railway enviou os dados)
-    # Isso vai aparecer na aba "Deploy Logs" se der erro.
-    print(f"🔌 TENTATIVA DE CONEXÃO:")
-    print(f"   > Host: {host if host else 'NÃO ENCONTRADO (Usando localhost?)'}")
-    print(f"   > User: {user if user else 'NÃO ENCONTRADO'}")
-    print(f"   > DB:   {db if db else 'NÃO ENCONTRADO'}")
-    print(f"   > Port: {port}")
+    # Isso vai aparecer na aba "Deploy Logs" — uma vez por processo, não a cada conexão.
+    if not _diagnostico_banco_feito:
+        _diagnostico_banco_feito = True
+        registrar("banco_configuracao", host=host or "NÃO ENCONTRADO", usuario=user or "NÃO ENCONTRADO", banco=db or "NÃO ENCONTRADO", porta=port)
 
     # 3. Se as variáveis não existirem, aborta para evitar erro de localhost
     if not host or not user or not password:
-        print("❌ ERRO CRÍTICO: As variáveis de ambiente (DB_HOST, etc) não foram definidas no Railway.")
+        registrar("banco_sem_variaveis", logging.ERROR, detalhe="DB_HOST, DB_USER e DB_PASSWORD não foram definidas no Railway")
         return None
 
     try:
-        conn = pymysql.connect(
-            host=host,
-            user=user,
-            password=password,
-            database=db,
-            port=port,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.Cursor,
-            connect_timeout=10
-        )
+        pymysql = importar("pymysql")
+        with ETAPA_SEGUNDOS.medir(etapa="banco_conexao"):
+            conn = pymysql.connect(
+                host=host,
+                user=user,
+                password=password,
+                database=db,
+                port=port,
+                charset='utf8mb4',
+                cursorclass=pymysql.cursors.Cursor,
+                connect_timeout=10,
+                # Conexões do pool são reutilizadas: com autocommit cada leitura enxerga o dado atual
+                # em vez do snapshot de uma transação antiga. commit() explícito continua valendo.
+                autocommit=True
+            )
         return conn
     except Exception as e:
-        print(f"❌ Erro ao conectar no MySQL: {e}")
+        registrar_erro("banco_conexao_falhou", e)
         return None
 
+class PoolConexoes:
+    """Pool de conexões por processo, com checagem de saúde e reciclagem de conexões velhas ou quebradas."""
+    def __init__(self, fabrica, tamanho, timeout, recycle, max_idade):
+        self.fabrica = fabrica
+        self.timeout = timeout
+        self.recycle = recycle
+        self.max_idade = max_idade
+        self.pid = os.getpid()
+        self._livres = queue.LifoQueue()  # itens: [conexao, criada_em, usada_em]
+        self._vagas = threading.BoundedSemaphore(tamanho)
+
+    def _saudavel(self, item):
+        conn, criada_em, usada_em = item
+        agora = time.monotonic()
+        if agora - criada_em > self.max_idade: return False
+        if agora - usada_em > self.recycle:
+            try: conn.ping(reconnect=False)
+            except Exception: return False
+        return True
+
+    def _fechar(self, item):
+        try: item[0].close()
+        except Exception: pass
+
+    def obter(self):
+        if not self._vagas.acquire(timeout=self.timeout):
+            registrar("banco_pool_esgotado", logging.ERROR, espera=self.timeout)
+            return None
+        try:
+            while True:
+                try: item = self._livres.get_nowait()
+                except queue.Empty: break
+                if self._saudavel(item): return item
+                self._fechar(item)
+            conn = self.fabrica()
+            if conn is None:
+                self._vagas.release()
+                return None
+            agora = time.monotonic()
+            return [conn, agora, agora]
+        except Exception:
+            self._vagas.release()
+            raise
+
+    def devolver(self, item, quebrada=False):
+        if quebrada: self._fechar(item)
+        else:
+            item[2] = time.monotonic()
+            self._livres.put(item)
+        self._vagas.release()
+
+    def fechar_todas(self):
+        # Conexão herdada de outro processo divide o socket com ele: fechar aqui derrubaria a dele.
+        if self.pid != os.getpid(): return
+        while True:
+            try: self._fechar(self._livres.get_nowait())
+            except queue.Empty: return
+
+    @contextmanager
+    def conexao(self):
+        item = self.obter()
+        if item is None:
+            yield None
+            return
+        quebrada = False
+        try:
+            yield item[0]
+        except Exception:
+            # Erro no meio do uso: desfaz o que ficou pendente; se nem isso der, a conexão é descartada.
+            try: item[0].rollback()
+            except Exception: quebrada = True
+            raise
+        finally:
+            if not item[0].open: quebrada = True
+            self.devolver(item, quebrada)
+
+_pool_banco = None
+_pool_banco_lock = threading.Lock()
+
+def obter_conexao():
+    """
+    Empresta uma conexão do pool do processo: `with obter_conexao() as conexao:`.
+    `conexao` é None quando o banco não está disponível. O pool é recriado após um fork.
+    """
+    global _pool_banco
+    if _pool_banco is None or _pool_banco.pid != os.getpid():
+        with _pool_banco_lock:
+            if _pool_banco is None or _pool_banco.pid != os.getpid():
+                _pool_banco = PoolConexoes(conectar_banco, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_MAX_AGE)
+                atexit.register(_pool_banco.fechar_todas)
+    return _pool_banco.conexao()
+
 # ---------------------------
 # Utilitárias
 # ---------------------------
-def limpar_link_google(url: str) -> str:
+LINKS_CACHE_MAX = int(os.getenv("LINKS_CACHE_MAX", "20000"))  # hrefs memoizados por processo
+DOMINIOS_BLOQUEADOS = ['facebook.com', 'twitter.com', 't.co', 'instagram.com', 'youtube.com', 'accounts.google.com', 'linkedin.com', 'bit.ly', 'tinyurl.com', 'meet.google.com']
+# Casa em qualquer parte do host (como sempre foi: "t.co" também barra "cnet.com").
+_RE_DOMINIO_BLOQUEADO = re.compile("|".join(re.escape(d) for d in DOMINIOS_BLOQUEADOS))
+_RE_BUSCA_INTERNA = re.compile(r"busca/click|/busca\?")
+_RE_NAO_NOTICIA = re.compile(r"busca|click|/search|query=")
+
+def desembrulhar_google(url):
+    """Tira o destino real de um redirecionamento do Google (/url?q=...); outros links voltam iguais."""
     try:
         if not url: return url
-        parsed = urlparse(url)
-        qs = parse_qs(parsed.query)
-        if 'q' in qs and qs['q']: return qs['q'][0]
-        if '/url?q=' in url:
-            part = url.split('/url?q=', 1)[1]
-            real = part.split('&', 1)[0]
-            return unquote(real)
+        q = parse_qs(urlsplit(url).query).get('q')
+        if q: return q[0]
+        if '/url?q=' in url: return unquote(url.split('/url?q=', 1)[1].split('&', 1)[0])
         return url
     except Exception: return url
 
-def normalize_link(link, prefer_domain=None):
-    if not link: return None
+def _endereco_de_noticia(partes, link):
+    if not partes.scheme or not partes.netloc: return False
+    if _RE_DOMINIO_BLOQUEADO.search(partes.netloc.lower()): return False
+    if ('/noticia/' in link or 'g1.globo.com' in partes.netloc) and len(partes.path.strip('/')) < 3: return False
+    return not _RE_NAO_NOTICIA.search(link)
+
+@lru_cache(maxsize=LINKS_CACHE_MAX)
+def classificar_link(link, prefer_domain=None):
+    """
+    Canoniza e classifica um href numa passada só. Retorna (link, aceito): o link como
+    esquema://host/caminho (None se não serve) e se o endereço tem cara de notícia; o título
+    é conferido à parte, em titulo_de_noticia. Memoizado: o mesmo href volta de graça.
+    """
+    if not link: return None, False
     try:
-        if "/url?q=" in link: link = limpar_link_google(link)
-        if 'busca/click' in link or '/busca?' in link: return None
+        if "/url?q=" in link: link = desembrulhar_google(link)
+        if _RE_BUSCA_INTERNA.search(link): return None, False
         if link.startswith('/') and prefer_domain: link = prefer_domain.rstrip('/') + link
-        parsed = urlparse(link)
-        if not parsed.scheme:
+        partes = urlparse(link)
+        if not partes.scheme:
             link = 'https://' + link
-            parsed = urlparse(link)
-        if 'google.' in parsed.netloc and not ('news' in parsed.path or 'g1.globo.com' in link):
-            if '/url' in parsed.path and 'q=' in parsed.query:
-                link = limpar_link_google(link)
-                parsed = urlparse(link)
-            else: return None
-        clean = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-        return clean
-    except Exception: return None
+            partes = urlparse(link)
+        if 'google.' in partes.netloc and not ('news' in partes.path or 'g1.globo.com' in link):
+            if '/url' not in partes.path or 'q=' not in partes.query: return None, False
+            link = desembrulhar_google(link)
+            partes = urlparse(link)
+        canonico = f"{partes.scheme}://{partes.netloc}{partes.path}"
+        # Sem host o texto canônico não se relê igual ("mailto:x" vira "mailto://x"): aí vale o relido.
+        if not partes.netloc: partes = urlparse(canonico)
+    except Exception: return None, False
+    return canonico, _endereco_de_noticia(partes, canonico)
 
+@lru_cache(maxsize=LINKS_CACHE_MAX)
 def extract_title_from_url(link):
     try:
         parsed = urlparse(link)
@@ -113,43 +477,586 @@ def extract_title_from_url(link):
         return ' '.join([w.capitalize() for w in title.split()])
     except Exception: return link
 
-def is_probably_article(title, link):
-    if not link: return False
-    try:
-        parsed = urlparse(link)
-        if not parsed.scheme or not parsed.netloc: return False
-        blacklist = ['facebook.com', 'twitter.com', 't.co', 'instagram.com', 'youtube.com', 'accounts.google.com', 'linkedin.com', 'bit.ly', 'tinyurl.com', 'meet.google.com']
-        net = parsed.netloc.lower()
-        if any(b in net for b in blacklist): return False
-        path = (parsed.path or '').strip('/')
-        if '/noticia/' in link or 'g1.globo.com' in parsed.netloc:
-            if len(path) < 3: return False
-        if any(x in link for x in ['busca', 'click', '/search', 'query=']): return False
-    except Exception: return False
-    if not title: return False
-    if title.startswith('http') or '=' in title or '%' in title:
-        derived = extract_title_from_url(link)
-        if not derived or len(derived) < 3: return False
-        title = derived
-    if '.' in title and ' ' not in title: return False
-    if len(title) < 6: return False
-    words = [w for w in title.split() if any(c.isalpha() for c in w)]
-    if len(words) < 2: return False
-    return True
+@lru_cache(maxsize=LINKS_CACHE_MAX)
+def titulo_de_noticia(titulo, link):
+    """Confere se o texto da âncora parece manchete; título que é URL ou query é trocado pelo do link."""
+    if not titulo: return False
+    if titulo.startswith('http') or '=' in titulo or '%' in titulo:
+        derivado = extract_title_from_url(link)
+        if not derivado or len(derivado) < 3: return False
+        titulo = derivado
+    if '.' in titulo and ' ' not in titulo: return False
+    if len(titulo) < 6: return False
+    palavras = 0
+    for w in titulo.split():
+        if any(map(str.isalpha, w)):
+            palavras += 1
+            if palavras == 2: return True
+    return False
 
 # ---------------------------
 # Sentimento
 # ---------------------------
+SENTIMENTO_OFFLINE = os.getenv("SENTIMENTO_OFFLINE", "0") == "1"
+SENTIMENTO_CACHE_MAX = int(os.getenv("SENTIMENTO_CACHE_MAX", "5000"))
+SENTIMENTO_CACHE_TTL = float(os.getenv("SENTIMENTO_CACHE_TTL", str(24 * 3600)))
+SENTIMENTO_FALHA_TTL = float(os.getenv("SENTIMENTO_FALHA_TTL", "300"))  # título sem tradução: nota offline, guardada por pouco tempo
+_LIMITE_LOTE_TRADUCAO = 4500  # o GoogleTranslator recusa textos acima de 5000 caracteres
+
+class CacheLRU:
+    """Dicionário limitado com expiração (TTL) e despejo LRU, seguro entre threads."""
+    def __init__(self, maximo, ttl):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave, default=None):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None: return default
+            valor, expira = item
+            if expira < time.monotonic():
+                del self._dados[chave]
+                return default
+            self._dados.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor, ttl=None):
+        with self._lock:
+            self._dados[chave] = (valor, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.maximo: self._dados.popitem(last=False)
+
+    def __len__(self): return len(self._dados)
+
+_cache_polaridade = CacheLRU(SENTIMENTO_CACHE_MAX, SENTIMENTO_CACHE_TTL)
+
+# Léxico mínimo para o modo offline (sem acentos, minúsculo).
+_LEXICO_PT = {
+    **dict.fromkeys("bom boa otimo otima excelente melhor melhora melhoria sucesso vitoria vence vencem venceu ganha ganhou "
+                    "conquista conquistou avanco avanca cresce crescimento alta recorde lucro aprova aprovado aprovada "
+                    "acordo celebra comemora feliz alegria esperanca positivo positiva recupera recuperacao salva "
+                    "inaugura beneficio premio premiado elogia apoio seguro segura forte estavel".split(), 1.0),
+    **dict.fromkeys("ruim pior piora crise morte morre morreu mortos morta mata matou assassinato tragedia acidente "
+                    "queda cai caiu despenca perda prejuizo fracasso derrota perde perdeu ataque violencia crime "
+                    "preso prisao fraude corrupcao escandalo denuncia golpe medo risco ameaca alerta greve protesto "
+                    "incendio enchente desastre negativo negativa demissao desemprego inflacao guerra ferido feridos "
+                    "roubo assalto falha colapso".split(), -1.0),
+}
+_NEGACOES = {"nao", "sem", "nunca", "jamais", "nem"}
+
+def _sem_acentos(texto):
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+
+def _polaridade_offline(texto):
+    """Polaridade em [-1, 1] direto do português, sem tradução."""
+    palavras = re.findall(r"[a-z]+", _sem_acentos(texto.lower()))
+    soma, achadas, negar = 0.0, 0, False
+    for p in palavras:
+        if p in _NEGACOES:
+            negar = True
+            continue
+        peso = _LEXICO_PT.get(p)
+        if peso is not None:
+            soma += -peso if negar else peso
+            achadas += 1
+        negar = False
+    if not achadas: return 0.0
+    return max(-1.0, min(1.0, soma / achadas))
+
+def _tradutor():
+    return importar("deep_translator", "GoogleTranslator")(source='auto', target='en')
+
+def _traduzir_lote(textos):
+    """
+    Traduz vários títulos por chamada, juntando-os por quebra de linha. Título que não traduziu volta
+    None; se a chamada falhar (tradutor fora do ar, lento), o lote e os seguintes voltam todos None.
+    """
+    traduzidos = []
+    lote, tamanho = [], 0
+    fora_do_ar = False
+    def enviar(lote):
+        nonlocal fora_do_ar
+        if fora_do_ar: return [None] * len(lote)
+        try:
+            saida = _tradutor().translate("\n".join(lote)) or ''
+        except Exception as e:
+            registrar_erro("traducao_lote_falhou", e, titulos=len(lote))
+            fora_do_ar = True
+            return [None] * len(lote)
+        partes = saida.split("\n")
+        if len(partes) == len(lote): return partes
+        # Tradutor juntou/quebrou linhas: volta para uma chamada por título.
+        saida = []
+        for t in lote:
+            try: saida.append(_tradutor().translate(t) or None)
+            except Exception: saida.append(None)
+        return saida
+    for t in textos:
+        if lote and tamanho + len(t) + 1 > _LIMITE_LOTE_TRADUCAO:
+            traduzidos.extend(enviar(lote))
+            lote, tamanho = [], 0
+        lote.append(t)
+        tamanho += len(t) + 1
+    if lote: traduzidos.extend(enviar(lote))
+    return traduzidos
+
+def _rotulo(polarity):
+    if polarity > 0.1: return 'positivo'
+    if polarity < -0.1: return 'negativo'
+    return 'neutro'
+
+def analisar_sentimentos(textos, offline=None):
+    """
+    Classifica vários títulos de uma vez. Cada título distinto é pontuado uma
+    única vez: os já vistos vêm do cache e o restante é traduzido em lote.
+    Título que o tradutor não devolveu leva a nota do léxico em português, que fica no
+    cache só por SENTIMENTO_FALHA_TTL: quando o tradutor voltar, ele é pontuado de novo.
+    """
+    if offline is None: offline = SENTIMENTO_OFFLINE
+    modo = "pt" if offline else "en"
+    normalizados = [" ".join((t or "").split()) for t in textos]
+    polaridades = {}
+    faltando = []
+    for t in normalizados:
+        if not t or t in polaridades: continue
+        p = _cache_polaridade.get((modo, t))
+        if p is None:
+            faltando.append(t)
+            polaridades[t] = None
+        else: polaridades[t] = p
+    distintos = len(polaridades)
+    if distintos > len(faltando): CACHE_TOTAL.inc(distintos - len(faltando), cache="polaridade", resultado="acerto")
+    if faltando:
+        CACHE_TOTAL.inc(len(faltando), cache="polaridade", resultado="falha")
+        provisorias = set()
+        try:
+            if offline: traduzidos = faltando
+            else:
+                with ETAPA_SEGUNDOS.medir(etapa="traducao"): traduzidos = _traduzir_lote(faltando)
+            with ETAPA_SEGUNDOS.medir(etapa="sentimento"):
+                if offline: calculadas = [_polaridade_offline(t) for t in traduzidos]
+                else:
+                    TextBlob = importar("textblob", "TextBlob")
+                    calculadas = []
+                    for t, tr in zip(faltando, traduzidos):
+                        if tr is None:
+                            # O TextBlob só entende inglês: o original em português daria "neutro".
+                            provisorias.add(t)
+                            calculadas.append(_polaridade_offline(t))
+                        else: calculadas.append(TextBlob(tr).sentiment.polarity)
+        except Exception as e:
+            registrar_erro("sentimento_falhou", e, titulos=len(faltando))
+            calculadas = [_polaridade_offline(t) for t in faltando]
+            provisorias.update(faltando)
+        for t, p in zip(faltando, calculadas):
+            polaridades[t] = p
+            _cache_polaridade.set((modo, t), p, SENTIMENTO_FALHA_TTL if t in provisorias else None)
+    return [_rotulo(polaridades[t]) if t else 'neutro' for t in normalizados]
+
 def analisar_sentimento(texto: str) -> str:
-    try:
-        if not texto: return 'neutro'
-        try: translated = GoogleTranslator(source='auto', target='en').translate(texto)
-        except Exception: translated = texto
-        polarity = TextBlob(translated).sentiment.polarity
-        if polarity > 0.1: return 'positivo'
-        if polarity < -0.1: return 'negativo'
-        return 'neutro'
-    except Exception: return 'neutro'
+    return analisar_sentimentos([texto])[0]
+
+# ---------------------------
+# Cliente HTTP das raspagens
+# ---------------------------
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.3"))
+HTTP_CONDICIONAL_MAX = int(os.getenv("HTTP_CONDICIONAL_MAX", "200"))
+HTTP_CONDICIONAL_TTL = float(os.getenv("HTTP_CONDICIONAL_TTL", "3600"))
+_sessoes_http = {}
+_sessoes_http_pid = None
+_sessoes_http_lock = threading.Lock()
+# url -> (etag, last_modified, corpo) para GET condicional
+_respostas_http = CacheLRU(HTTP_CONDICIONAL_MAX, HTTP_CONDICIONAL_TTL)
+
+def _nova_sessao_http():
+    requests = importar("requests")
+    Retry = importar("urllib3.util.retry", "Retry")
+    # read=0: timeout de leitura não repete; a nova tentativa teria o timeout inteiro de novo e
+    # passaria do orçamento da fonte (FONTE_TIMEOUT), prendendo a thread dela.
+    retry = Retry(total=HTTP_RETRIES, connect=HTTP_RETRIES, read=0, status=HTTP_RETRIES,
+                  # 429 fica de fora: repetir logo em seguida só piora o limite; quem recua é o disjuntor da fonte.
+                  backoff_factor=HTTP_BACKOFF, status_forcelist=(500, 502, 503, 504),
+                  allowed_methods=frozenset(["GET"]), respect_retry_after_header=False, raise_on_status=False)
+    adapter = importar("requests.adapters", "HTTPAdapter")(pool_connections=1, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retry)
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    # ACCEPT_ENCODING do urllib3 já inclui "br" quando há suporte a brotli instalado.
+    s.headers.update({"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)", "Accept-Encoding": importar("urllib3.util.request", "ACCEPT_ENCODING")})
+    return s
+
+def sessao_http(host):
+    """Sessão keep-alive compartilhada por host (uma por processo)."""
+    global _sessoes_http_pid
+    with _sessoes_http_lock:
+        if _sessoes_http_pid != os.getpid():
+            _sessoes_http.clear()
+            _sessoes_http_pid = os.getpid()
+        s = _sessoes_http.get(host)
+        if s is None: s = _sessoes_http[host] = _nova_sessao_http()
+    return s
+
+def http_get(url, headers=None, timeout=10):
+    """
+    GET pela sessão do host, com retentativas e compressão. Quando a última resposta trouxe
+    ETag/Last-Modified, manda a requisição condicional e reaproveita o corpo num 304.
+    """
+    hdrs = dict(headers or {})
+    anterior = _respostas_http.get(url)
+    if anterior:
+        etag, modificado, _ = anterior
+        if etag: hdrs["If-None-Match"] = etag
+        if modificado: hdrs["If-Modified-Since"] = modificado
+    host = urlparse(url).netloc
+    with ETAPA_SEGUNDOS.medir(etapa="upstream"): resp = sessao_http(host).get(url, headers=hdrs, timeout=timeout)
+    UPSTREAM_TOTAL.inc(host=host, status=resp.status_code)
+    if resp.status_code == 304 and anterior: return anterior[2]
+    resp.raise_for_status()
+    etag, modificado = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+    if etag or modificado: _respostas_http.set(url, (etag, modificado, resp.text))
+    return resp.text
+
+# ---------------------------
+# Navegadores headless (fallback Selenium)
+# ---------------------------
+SELENIUM_MAX = int(os.getenv("SELENIUM_MAX", "2"))                    # Chromes simultâneos por processo
+SELENIUM_PREAQUECER = int(os.getenv("SELENIUM_PREAQUECER", "0"))      # quantos já deixar abertos ao criar o pool
+SELENIUM_MAX_USOS = int(os.getenv("SELENIUM_MAX_USOS", "50"))         # depois disso o Chrome é fechado e refeito
+SELENIUM_ESPERA = float(os.getenv("SELENIUM_ESPERA", "6"))            # espera máxima pelos seletores de resultado
+SELENIUM_FILA_TIMEOUT = float(os.getenv("SELENIUM_FILA_TIMEOUT", "10"))
+
+class PoolNavegadores:
+    """Chromes headless reaproveitados entre buscas, com limite de instâncias e reciclagem."""
+    def __init__(self, maximo, max_usos):
+        self.maximo = maximo
+        self.max_usos = max_usos
+        self.pid = os.getpid()
+        self._livres = queue.LifoQueue()  # itens: [driver, usos]
+        self._vagas = threading.BoundedSemaphore(maximo)
+
+    def _abrir(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        options = Options()
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        driver = webdriver.Chrome(options=options)
+        driver.set_page_load_timeout(15)
+        return [driver, 0]
+
+    def _fechar(self, item):
+        try: item[0].quit()
+        except Exception: pass
+
+    def preaquecer(self, quantidade):
+        def abrir():
+            for _ in range(min(quantidade, self.maximo)):
+                try: self._livres.put(self._abrir())
+                except Exception as e:
+                    registrar_erro("navegador_preabertura_falhou", e)
+                    return
+        threading.Thread(target=abrir, name="preaquecer-chrome", daemon=True).start()
+
+    def fechar_todos(self):
+        while True:
+            try: self._fechar(self._livres.get_nowait())
+            except queue.Empty: return
+
+    @contextmanager
+    def navegador(self, timeout=None):
+        if not self._vagas.acquire(timeout=SELENIUM_FILA_TIMEOUT if timeout is None else timeout):
+            raise TimeoutError("nenhum Chrome livre no pool")
+        item = None
+        quebrado = False
+        try:
+            try: item = self._livres.get_nowait()
+            except queue.Empty: item = self._abrir()
+            yield item[0]
+        except Exception:
+            # Driver que falhou no meio (crash, timeout de carga) não volta para o pool.
+            quebrado = True
+            raise
+        finally:
+            if item is not None:
+                item[1] += 1
+                if quebrado or item[1] >= self.max_usos: self._fechar(item)
+                else: self._livres.put(item)
+            self._vagas.release()
+
+_pool_navegadores = None
+_pool_navegadores_lock = threading.Lock()
+
+def _obter_pool_navegadores():
+    global _pool_navegadores
+    if _pool_navegadores is None or _pool_navegadores.pid != os.getpid():
+        with _pool_navegadores_lock:
+            if _pool_navegadores is None or _pool_navegadores.pid != os.getpid():
+                _pool_navegadores = PoolNavegadores(SELENIUM_MAX, SELENIUM_MAX_USOS)
+                atexit.register(_pool_navegadores.fechar_todos)
+                if SELENIUM_PREAQUECER: _pool_navegadores.preaquecer(SELENIUM_PREAQUECER)
+    return _pool_navegadores
+
+def renderizar_pagina(url, seletores, espera=None):
+    """Carrega `url` num Chrome do pool e devolve o HTML assim que algum dos seletores aparecer."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+    with _obter_pool_navegadores().navegador() as driver:
+        driver.get(url)
+        try:
+            WebDriverWait(driver, SELENIUM_ESPERA if espera is None else espera, poll_frequency=0.2).until(
+                lambda d: any(d.find_elements(By.CSS_SELECTOR, s) for s in seletores))
+        except TimeoutException:
+            pass  # sem resultados visíveis: segue com o que carregou
+        return driver.page_source
+
+# ---------------------------
+# Extração de HTML (passada única)
+# ---------------------------
+# Tags sem conteúdo e tags cujo texto não entra no get_text() — mesmas regras do BeautifulSoup com html.parser,
+# para que a extração devolva exatamente o que as raspagens devolviam com o soup.
+_TAGS_VAZIAS = frozenset("area base br col embed hr img input keygen link menuitem meta param source track wbr "
+                         "basefont bgsound command frame image isindex nextid spacer".split())
+_TAGS_TEXTO_ESPECIAL = frozenset(["script", "style", "template", "rt", "rp"])
+_TAGS_TITULO = frozenset(["h1", "h2", "h3", "h4"])
+_RE_SELETOR = re.compile(r"^(?P<tag>[a-zA-Z][\w-]*)?(?P<resto>(?:\.[\w-]+|\[[\w-]+(?:[*^]?=['\"][^'\"]*['\"])?\])*)$")
+_RE_PARTE = re.compile(r"\.(?P<classe>[\w-]+)|\[(?P<attr>[\w-]+)(?:(?P<op>[*^]?=)['\"](?P<valor>[^'\"]*)['\"])?\]")
+
+class SeletorCSS:
+    """
+    Subconjunto de CSS usado pelas raspagens: tag, .classe, [attr], [attr*=v], [attr^=v], [attr=v] e
+    descendente (espaço). Para os ancestrais, cada elemento aberto guarda quantas partes do seletor a
+    cadeia até ele já satisfaz, então casar um elemento não percorre a pilha.
+    """
+    __slots__ = ("texto", "partes", "indice")
+
+    def __init__(self, texto):
+        self.texto = texto
+        self.indice = None
+        self.partes = []
+        for composto in texto.split():
+            m = _RE_SELETOR.match(composto)
+            if not m: raise ValueError(f"Seletor não suportado: {texto}")
+            classes, attrs = [], []
+            for p in _RE_PARTE.finditer(m.group("resto")):
+                if p.group("classe"): classes.append(p.group("classe"))
+                else: attrs.append((p.group("attr").lower(), p.group("op"), p.group("valor")))
+            self.partes.append(((m.group("tag") or "").lower() or None, frozenset(classes), tuple(attrs)))
+
+    @property
+    def tag(self):
+        return self.partes[-1][0]
+
+    @staticmethod
+    def _casa(parte, q):
+        tag, classes, attrs = parte
+        if tag and q.tag != tag: return False
+        if classes and not classes <= q.classes: return False
+        for nome, op, valor in attrs:
+            v = q.attrs.get(nome)
+            if v is None: return False
+            if op == "*=" and (not valor or valor not in v): return False
+            if op == "^=" and (not valor or not v.startswith(valor)): return False
+            if op == "=" and v != valor: return False
+        return True
+
+    def casa(self, q):
+        if not self._casa(self.partes[-1], q): return False
+        return self.indice is None or q.pai.progresso[self.indice] >= len(self.partes) - 1
+
+class EspecExtracao:
+    """
+    Seletores de uma página, compilados uma vez no import. `alvos` são os elementos procurados
+    no documento todo; `dentro` mapeia seletor -> `dentro` do próximo nível, e guarda a primeira
+    ocorrência de cada seletor dentro de um alvo (como select_one/find). Com `titulo_do_pai`, cada
+    alvo também sabe o texto do primeiro h1-h4 dentro do elemento pai.
+    """
+    def __init__(self, alvos, dentro=None, titulo_do_pai=False):
+        self.alvos = [SeletorCSS(s) for s in alvos]
+        self.compostos = [s for s in self.alvos if len(s.partes) > 1]
+        self.dentro = self._compilar(dentro or {})
+        self.titulo_do_pai = titulo_do_pai
+        self.por_tag = {}
+        for s in self.alvos: self.por_tag.setdefault(s.tag, []).append(s)
+        for i, s in enumerate(self.compostos): s.indice = i
+        self.progresso_inicial = (0,) * len(self.compostos)
+
+    def _compilar(self, dentro):
+        compilados = []
+        for texto, sub in dentro.items():
+            sel = SeletorCSS(texto)
+            if len(sel.partes) > 1: self.compostos.append(sel)
+            compilados.append((sel, self._compilar(sub)))
+        return compilados
+
+    def progresso(self, pai, q):
+        """Partes iniciais de cada seletor composto satisfeitas pela cadeia raiz..q (casamento guloso)."""
+        anterior = pai.progresso
+        novo = None
+        for i, sel in enumerate(self.compostos):
+            k = anterior[i]
+            if k < len(sel.partes) - 1 and sel._casa(sel.partes[k], q):
+                if novo is None: novo = list(anterior)
+                novo[i] = k + 1
+        return anterior if novo is None else tuple(novo)
+
+class NoExtraido:
+    """Elemento capturado: atributos, texto (em strings separadas, como no soup) e as sub-capturas."""
+    __slots__ = ("tag", "attrs", "_strings", "_ultima", "_dentro", "_achados", "pai")
+
+    def __init__(self, quadro, dentro):
+        self.tag = quadro.tag
+        self.attrs = quadro.attrs
+        self._strings = []
+        self._ultima = -1
+        self._dentro = dentro
+        self._achados = {}
+        self.pai = quadro.pai
+
+    def get(self, nome, default=None):
+        return self.attrs.get(nome, default)
+
+    def get_text(self, separator="", strip=False):
+        if strip: return separator.join(s for s in (t.strip() for t in self._strings) if s)
+        return separator.join(self._strings)
+
+    def primeiro(self, seletor):
+        """Primeiro descendente que casa com `seletor` (precisa estar declarado em `dentro`)."""
+        return self._achados.get(seletor)
+
+    def titulo_do_pai(self):
+        h = self.pai.titulo if self.pai is not None else None
+        return h.get_text(strip=True) if h is not None else ""
+
+class _Quadro:
+    __slots__ = ("tag", "attrs", "classes", "pai", "titulo", "captura", "progresso")
+
+    def __init__(self, tag, attrs, pai):
+        self.tag = tag
+        self.attrs = attrs
+        self.classes = frozenset(attrs["class"].split()) if "class" in attrs else frozenset()
+        self.pai = pai
+        self.titulo = None
+        self.captura = None
+        self.progresso = None
+
+class _ParserExtracao(HTMLParser):
+    def __init__(self, espec):
+        super().__init__(convert_charrefs=True)
+        self.espec = espec
+        self.raiz = _Quadro("[documento]", {}, None)
+        self.raiz.progresso = espec.progresso_inicial
+        self.pilha = [self.raiz]
+        self.capturas = []       # capturas abertas, recebendo texto
+        self.especiais = 0       # script/style/... abertos: texto deles não conta
+        self.string_id = 0       # muda a cada tag/comentário: delimita as strings como o soup faz
+        self.alvos = {s.texto: [] for s in espec.alvos}
+
+    def _abrir(self, tag, attrs):
+        self.string_id += 1
+        pai = self.pilha[-1]
+        q = _Quadro(tag, attrs, pai)
+        q.progresso = self.espec.progresso(pai, q) if self.espec.compostos else pai.progresso
+        self.pilha.append(q)
+        # sub-seletores pendentes das capturas abertas (primeira ocorrência em ordem de documento)
+        capturas = self.capturas
+        for i in range(len(capturas)):
+            c = capturas[i]
+            for sel, sub in c._dentro:
+                if sel.texto not in c._achados and sel.casa(q):
+                    c._achados[sel.texto] = self._capturar(q, sub)
+        for grupo in (self.espec.por_tag.get(tag, ()), self.espec.por_tag.get(None, ())):
+            for sel in grupo:
+                if sel.casa(q):
+                    if q.captura is None: self._capturar(q, self.espec.dentro)
+                    self.alvos[sel.texto].append(q.captura)
+        if self.espec.titulo_do_pai and tag in _TAGS_TITULO:
+            h = q.captura or self._capturar(q, [])
+            for anc in reversed(self.pilha[:-1]):
+                if anc.titulo is not None: break
+                anc.titulo = h
+        if tag in _TAGS_TEXTO_ESPECIAL: self.especiais += 1
+        return q
+
+    def _capturar(self, q, dentro):
+        if q.captura is None:
+            q.captura = NoExtraido(q, dentro)
+            self.capturas.append(q.captura)
+        elif dentro is not q.captura._dentro:
+            # mesmo elemento pedido por dois caminhos (alvo e sub-seletor): procura os dois conjuntos
+            q.captura._dentro = q.captura._dentro + [d for d in dentro if d not in q.captura._dentro]
+        return q.captura
+
+    def _fechar(self, q):
+        if q.captura is not None:
+            try: self.capturas.remove(q.captura)
+            except ValueError: pass
+        if q.tag in _TAGS_TEXTO_ESPECIAL: self.especiais -= 1
+
+    def handle_starttag(self, tag, attrs):
+        q = self._abrir(tag, {k: (v if v is not None else "") for k, v in attrs})
+        if tag in _TAGS_VAZIAS:
+            self.pilha.pop()
+            self._fechar(q)
+
+    def handle_startendtag(self, tag, attrs):
+        q = self._abrir(tag, {k: (v if v is not None else "") for k, v in attrs})
+        self.pilha.pop()
+        self._fechar(q)
+
+    def handle_endtag(self, tag):
+        self.string_id += 1
+        if tag in _TAGS_VAZIAS: return
+        # Fecha até a abertura mais recente da mesma tag; fechamento sem abertura é ignorado.
+        for i in range(len(self.pilha) - 1, 0, -1):
+            if self.pilha[i].tag == tag:
+                while len(self.pilha) > i: self._fechar(self.pilha.pop())
+                return
+
+    def handle_data(self, data):
+        if self.especiais or not self.capturas: return
+        for c in self.capturas:
+            if c._ultima == self.string_id: c._strings[-1] += data
+            else:
+                c._strings.append(data)
+                c._ultima = self.string_id
+
+    def handle_comment(self, data): self.string_id += 1
+    def handle_decl(self, decl): self.string_id += 1
+    def handle_pi(self, data): self.string_id += 1
+    def unknown_decl(self, data): self.string_id += 1
+
+def extrair(html, espec):
+    """Uma passada pelo HTML; devolve {seletor_alvo: [NoExtraido, ...]} em ordem de documento."""
+    with ETAPA_SEGUNDOS.medir(etapa="parse"):
+        parser = _ParserExtracao(espec)
+        parser.feed(html or "")
+        parser.close()
+    return parser.alvos
+
+def primeiro_nao_vazio(alvos, seletores):
+    """Equivalente a `soup.select(a) or soup.select(b) or ...`."""
+    for s in seletores:
+        if alvos.get(s): return alvos[s]
+    return []
+
+_SELETORES_G1 = ["a.widget--info__title", "a.feed-post-link", "a[href*='/noticia/']", "article a", "div.search-body a", "h3 a"]
+_SELETORES_G1_NAVEGADOR = ["a[href*='/noticia/']", "article a"]
+_BLOCOS_GOOGLE = ["div.dbsr", "g-card", "div.xuvV6b", "div.SoaBEf"]
+_TITULOS_GOOGLE = ["div.JheGif", "h3", "div.MBeuO span"]
+_BLOCOS_GOOGLE_NAVEGADOR = ["div.SoaBEf", "div.dbsr"]
+_TITULOS_GOOGLE_NAVEGADOR = ["div.MBeuO span", "div.JheGif", "h3"]
+ESPEC_G1 = EspecExtracao(_SELETORES_G1, titulo_do_pai=True)
+ESPEC_G1_NAVEGADOR = EspecExtracao(_SELETORES_G1_NAVEGADOR)
+ESPEC_GOOGLE = EspecExtracao(_BLOCOS_GOOGLE + ["a[href^='/url?q=']"],
+                             dentro={"a": dict.fromkeys(_TITULOS_GOOGLE, {}), **dict.fromkeys(_TITULOS_GOOGLE, {})})
+ESPEC_GOOGLE_NAVEGADOR = EspecExtracao(_BLOCOS_GOOGLE_NAVEGADOR, dentro={"a": {}, **dict.fromkeys(_TITULOS_GOOGLE_NAVEGADOR, {})})
 
 # ---------------------------
 # Raspagens
@@ -159,15 +1066,9 @@ def raspar_g1_requests(termo, limite=20):
     try:
         q = quote_plus(termo)
         url = f"https://g1.globo.com/busca/?q={q}"
-        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-        resp = requests.get(url, headers=headers, timeout=10)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-        selectors = ["a.widget--info__title", "a.feed-post-link", "a[href*='/noticia/']", "article a", "div.search-body a", "h3 a"]
-        anchors = []
-        for sel in selectors:
-            found = soup.select(sel)
-            if found: anchors.extend(found)
+        alvos = extrair(http_get(url, timeout=10), ESPEC_G1)
+        inicio = time.perf_counter()
+        anchors = [a for sel in _SELETORES_G1 for a in alvos[sel]]
         seen_hrefs = set()
         filtered_anchors = []
         for a in anchors:
@@ -178,28 +1079,23 @@ def raspar_g1_requests(termo, limite=20):
         seen = set()
         for a in filtered_anchors:
             raw_link = a.get('href') or a.get('data-href') or ''
-            link = normalize_link(raw_link, prefer_domain='https://g1.globo.com')
-            if not link:
-                link = urljoin('https://g1.globo.com', raw_link)
-                link = normalize_link(link, prefer_domain='https://g1.globo.com')
-            if not link: continue
+            link, aceito = classificar_link(raw_link, 'https://g1.globo.com')
+            if not link: link, aceito = classificar_link(urljoin('https://g1.globo.com', raw_link), 'https://g1.globo.com')
+            if not link or not aceito: continue
             titulo = a.get_text(strip=True) or a.get('title') or ''
-            if not titulo:
-                parent = a.find_parent()
-                if parent:
-                    h = parent.find(['h1', 'h2', 'h3', 'h4'])
-                    if h: titulo = h.get_text(strip=True)
+            if not titulo: titulo = a.titulo_do_pai()
             if not titulo: titulo = extract_title_from_url(link)
-            if not is_probably_article(titulo, link): continue
+            if not titulo_de_noticia(titulo, link): continue
             key = (titulo[:140], link)
             if key in seen: continue
             seen.add(key)
             resultados.append({"titulo": titulo, "link": link, "orig_link": raw_link or link, "fonte": "G1"})
             if len(resultados) >= limite: break
+        ETAPA_SEGUNDOS.observar(time.perf_counter() - inicio, etapa="links")
     except Exception as e:
-        print("Erro raspar_g1_requests:", e)
-        traceback.print_exc()
-    print(f"✅ G1 (requests) encontrou: {len(resultados)}")
+        if falha_http(e): raise  # falha de rede/HTTP sobe para a fonte decidir o fallback e contar no disjuntor
+        registrar_erro("raspagem_falhou", e, detalhe=True, fonte="g1", via="requests")
+    registrar("raspagem", fonte="g1", via="requests", itens=len(resultados))
     return resultados
 
 def raspar_google_requests(termo, limite=12):
@@ -207,137 +1103,1167 @@ def raspar_google_requests(termo, limite=12):
     try:
         q = quote_plus(termo)
         url = f"https://www.google.com/search?q={q}&tbm=nws&hl=pt-BR"
-        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)", "Accept-Language": "pt-BR,pt;q=0.9"}
-        resp = requests.get(url, headers=headers, timeout=10)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-        blocks = soup.select("div.dbsr") or soup.select("g-card") or soup.select("div.xuvV6b") or soup.select("div.SoaBEf")
-        anchors = []
-        for b in blocks:
-            a = b.find('a')
-            if a: anchors.append(a)
-        if not anchors: anchors = soup.select("a[href^='/url?q=']")
+        alvos = extrair(http_get(url, headers={"Accept-Language": "pt-BR,pt;q=0.9"}, timeout=10), ESPEC_GOOGLE)
+        inicio = time.perf_counter()
+        anchors = [b.primeiro("a") for b in primeiro_nao_vazio(alvos, _BLOCOS_GOOGLE) if b.primeiro("a")]
+        if not anchors: anchors = alvos["a[href^='/url?q=']"]
         seen = set()
         for a in anchors:
             raw_link = a.get('href') or ''
-            link = normalize_link(raw_link)
-            if not link:
-                link = limpar_link_google(raw_link)
-                link = normalize_link(link)
-            if not link: continue
-            title_elem = a.select_one("div.JheGif") or a.select_one("h3") or a.select_one("div.MBeuO span")
+            link, aceito = classificar_link(raw_link)
+            if not link: link, aceito = classificar_link(desembrulhar_google(raw_link))
+            if not link or not aceito: continue
+            title_elem = a.primeiro("div.JheGif") or a.primeiro("h3") or a.primeiro("div.MBeuO span")
             title = title_elem.get_text(" ", strip=True) if title_elem else a.get_text(" ", strip=True)
             if not title or len(title) < 4: title = extract_title_from_url(link)
-            if not is_probably_article(title, link): continue
+            if not titulo_de_noticia(title, link): continue
             key = (title[:140], link)
             if key in seen: continue
             seen.add(key)
             resultados.append({"titulo": title, "link": link, "orig_link": raw_link, "fonte": "Google Notícias"})
             if len(resultados) >= limite: break
+        ETAPA_SEGUNDOS.observar(time.perf_counter() - inicio, etapa="links")
     except Exception as e:
-        print("Erro raspar_google_requests:", e)
-        traceback.print_exc()
-    print(f"✅ Google (requests) encontrou: {len(resultados)}")
+        if falha_http(e): raise
+        registrar_erro("raspagem_falhou", e, detalhe=True, fonte="google", via="requests")
+    registrar("raspagem", fonte="google", via="requests", itens=len(resultados))
     return resultados
 
 def raspar_g1(termo):
-    res = raspar_g1_requests(termo, limite=12)
-    if res: return res
-    try:
-        print("⚠️ G1 via requests não retornou — tentando Selenium fallback...")
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-        import time
-        options = Options()
-        options.add_argument("--headless=new")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        driver = webdriver.Chrome(options=options)
-        driver.get(f"https://g1.globo.com/busca/?q={quote_plus(termo)}")
-        time.sleep(2)
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        driver.quit()
-        resultados = []
-        a_tags = soup.select("a[href*='/noticia/']") or soup.select("article a")
-        seen = set()
-        for a in a_tags:
-            raw_link = a.get('href', '')
-            link = normalize_link(raw_link, prefer_domain='https://g1.globo.com')
-            if not link: continue
-            titulo = a.get_text(strip=True) or extract_title_from_url(link)
-            if not is_probably_article(titulo, link): continue
-            key = (titulo[:120], link)
-            if key in seen: continue
-            seen.add(key)
-            resultados.append({"titulo": titulo, "link": link, "orig_link": raw_link or link, "fonte": "G1"})
-            if len(resultados) >= 8: break
-        return resultados
-    except Exception as e:
-        print("Fallback Selenium G1 falhou:", e)
-        return []
+    return FONTES["g1"].buscar(termo)
 
 def raspar_google_noticias(termo):
-    res = raspar_google_requests(termo, limite=12)
-    if res: return res
-    try:
-        print("⚠️ Google (requests) não retornou — tentando Selenium fallback...")
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-        import time
-        options = Options()
-        options.add_argument("--headless=new")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        driver = webdriver.Chrome(options=options)
-        driver.get(f"https://www.google.com/search?q={quote_plus(termo)}&tbm=nws")
-        time.sleep(2)
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        driver.quit()
-        resultados = []
-        blocos = soup.select("div.SoaBEf") or soup.select("div.dbsr")
-        seen = set()
-        for b in blocos:
-            a = b.find('a')
-            raw_link = a.get('href') if a else ''
-            link = normalize_link(raw_link)
-            if not link: continue
-            title_elem = b.select_one("div.MBeuO span") or b.select_one("div.JheGif") or b.select_one("h3")
-            title = title_elem.get_text(strip=True) if title_elem else ''
-            if not title or title.startswith('http') or len(title) < 4: title = extract_title_from_url(link)
-            key = (title[:140], link)
-            if key in seen: continue
-            seen.add(key)
-            resultados.append({"titulo": title, "link": link, "fonte": "Google Notícias"})
-            if len(resultados) >= 12: break
-        return resultados
-    except Exception as e:
-        print("Fallback Selenium Google falhou:", e)
+    return FONTES["google"].buscar(termo)
+
+def raspar_g1_navegador(termo):
+    html = renderizar_pagina(f"https://g1.globo.com/busca/?q={quote_plus(termo)}", _SELETORES_G1_NAVEGADOR)
+    resultados = []
+    a_tags = primeiro_nao_vazio(extrair(html, ESPEC_G1_NAVEGADOR), _SELETORES_G1_NAVEGADOR)
+    seen = set()
+    for a in a_tags:
+        raw_link = a.get('href', '')
+        link, aceito = classificar_link(raw_link, 'https://g1.globo.com')
+        if not link or not aceito: continue
+        titulo = a.get_text(strip=True) or extract_title_from_url(link)
+        if not titulo_de_noticia(titulo, link): continue
+        key = (titulo[:120], link)
+        if key in seen: continue
+        seen.add(key)
+        resultados.append({"titulo": titulo, "link": link, "orig_link": raw_link or link, "fonte": "G1"})
+        if len(resultados) >= 8: break
+    return resultados
+
+def raspar_google_navegador(termo):
+    html = renderizar_pagina(f"https://www.google.com/search?q={quote_plus(termo)}&tbm=nws", _BLOCOS_GOOGLE_NAVEGADOR)
+    resultados = []
+    blocos = primeiro_nao_vazio(extrair(html, ESPEC_GOOGLE_NAVEGADOR), _BLOCOS_GOOGLE_NAVEGADOR)
+    seen = set()
+    for b in blocos:
+        a = b.primeiro('a')
+        raw_link = a.get('href') if a else ''
+        link, _ = classificar_link(raw_link)
+        if not link: continue
+        title_elem = b.primeiro("div.MBeuO span") or b.primeiro("div.JheGif") or b.primeiro("h3")
+        title = title_elem.get_text(strip=True) if title_elem else ''
+        if not title or title.startswith('http') or len(title) < 4: title = extract_title_from_url(link)
+        key = (title[:140], link)
+        if key in seen: continue
+        seen.add(key)
+        resultados.append({"titulo": title, "link": link, "fonte": "Google Notícias"})
+        if len(resultados) >= 12: break
+    return resultados
+
+# ---------------------------
+# Fontes de notícias (adaptadores)
+# ---------------------------
+# Limites padrão de cada fonte; dá para ajustar por fonte com FONTE_<CHAVE>_<LIMITE> (ex.: FONTE_G1_TAXA).
+FONTE_CONCORRENCIA = int(os.getenv("FONTE_CONCORRENCIA", "4"))   # raspagens simultâneas da mesma fonte
+FONTE_TAXA = float(os.getenv("FONTE_TAXA", "2"))                 # requisições por segundo (0 = sem limite)
+FONTE_RAJADA = float(os.getenv("FONTE_RAJADA", "4"))             # requisições liberadas de uma vez
+FONTE_TIMEOUT = float(os.getenv("FONTE_TIMEOUT", "10"))          # orçamento de tempo de uma raspagem
+FONTE_FALHAS = int(os.getenv("FONTE_FALHAS", "3"))               # falhas seguidas que abrem o disjuntor
+FONTE_PAUSA = float(os.getenv("FONTE_PAUSA", "60"))              # segundos com o disjuntor aberto
+
+class BaldeTokens:
+    """Limite de taxa por balde de fichas: `taxa` fichas por segundo, acumulando até `rajada`."""
+    def __init__(self, taxa, rajada):
+        self.taxa = taxa
+        self.rajada = max(1.0, rajada)
+        self._fichas = self.rajada
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consumir(self, espera):
+        """Pega uma ficha, esperando no máximo `espera` segundos por ela (0 = só se houver agora). False se não der tempo."""
+        if self.taxa <= 0: return True
+        with self._lock:
+            agora = time.monotonic()
+            self._fichas = min(self.rajada, self._fichas + (agora - self._ultimo) * self.taxa)
+            self._ultimo = agora
+            falta = (1 - self._fichas) / self.taxa if self._fichas < 1 else 0
+            if falta > espera: return False
+            # A ficha fica reservada (saldo negativo) enquanto a thread dorme fora do lock.
+            self._fichas -= 1
+        if falta: time.sleep(falta)
+        return True
+
+class Disjuntor:
+    """
+    Circuit breaker: depois de `falhas` erros seguidos a fonte fica `pausa` segundos sem ser chamada.
+    Passada a pausa, uma única chamada de teste decide se fecha de novo ou volta a pausar.
+    """
+    def __init__(self, nome, falhas, pausa):
+        self.nome = nome
+        self.falhas_para_abrir = falhas
+        self.pausa = pausa
+        self._falhas = 0
+        self._aberto_ate = 0.0
+        self._testando = False
+        self._lock = threading.Lock()
+
+    @property
+    def estado(self):
+        if self.falhas_para_abrir <= 0 or self._falhas < self.falhas_para_abrir: return "fechado"
+        if self._testando or time.monotonic() < self._aberto_ate: return "aberto"
+        return "meio-aberto"
+
+    def permite(self):
+        with self._lock:
+            if self.falhas_para_abrir <= 0 or self._falhas < self.falhas_para_abrir: return True
+            if self._testando or time.monotonic() < self._aberto_ate: return False
+            self._testando = True
+            return True
+
+    def desistir(self):
+        """Libera a vaga de teste de quem passou pelo disjuntor mas não chegou a chamar a fonte."""
+        with self._lock: self._testando = False
+
+    def sucesso(self):
+        with self._lock:
+            if self._falhas >= self.falhas_para_abrir > 0: registrar("fonte_recuperada", fonte=self.nome)
+            self._falhas = 0
+            self._testando = False
+
+    def falha(self):
+        with self._lock:
+            self._falhas += 1
+            self._testando = False
+            if self.falhas_para_abrir > 0 and self._falhas >= self.falhas_para_abrir:
+                self._aberto_ate = time.monotonic() + self.pausa
+                registrar("fonte_em_pausa", logging.WARNING, fonte=self.nome, pausa=self.pausa, falhas=self._falhas)
+
+class FonteNoticias:
+    """
+    Adaptador de uma fonte de notícias. A subclasse define `chave`, `nome`, `buscar_requests`
+    e, se tiver, `buscar_navegador`; a base cuida do fallback e dos limites da fonte
+    (concorrência, taxa, orçamento de tempo e disjuntor).
+    """
+    chave = None
+    nome = None
+
+    def __init__(self):
+        prefixo = f"FONTE_{self.chave.upper()}_"
+        def conf(nome, padrao): return type(padrao)(os.getenv(prefixo + nome, padrao))
+        self.concorrencia = conf("CONCORRENCIA", FONTE_CONCORRENCIA)
+        self.timeout = conf("TIMEOUT", FONTE_TIMEOUT)
+        self.balde = BaldeTokens(conf("TAXA", FONTE_TAXA), conf("RAJADA", FONTE_RAJADA))
+        self.disjuntor = Disjuntor(self.nome, conf("FALHAS", FONTE_FALHAS), conf("PAUSA", FONTE_PAUSA))
+        self._rodando = {}  # id da raspagem -> início (monotonic), das que estão numa thread da fonte
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+
+    def _obter_executor(self):
+        # Um pool por fonte, do tamanho das vagas dela: fonte travada só ocupa as próprias threads.
+        # Threads não sobrevivem ao fork: um pool herdado do master (--preload) é refeito.
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._executor_lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=max(1, self.concorrencia), thread_name_prefix=f"fonte-{self.chave}")
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def buscar_requests(self, termo):
+        raise NotImplementedError
+
+    def buscar_navegador(self, termo):
         return []
 
-def salvar_no_banco(resultados, termo):
+    def buscar(self, termo):
+        """Raspa via requests e cai para o navegador headless se vier vazio. Erro de rede sem fallback sobe."""
+        falha = None
+        try:
+            res = self.buscar_requests(termo)
+            if res: return res
+        except Exception as e:
+            if not falha_http(e): raise
+            registrar_erro("fonte_requests_falhou", e, fonte=self.chave)
+            falha = e
+        try:
+            registrar("fallback_navegador", logging.WARNING, fonte=self.chave)
+            res = self.buscar_navegador(termo)
+            FALLBACK_TOTAL.inc(fonte=self.chave, resultado="ok" if res else "vazio")
+            return res
+        except Exception as e:
+            FALLBACK_TOTAL.inc(fonte=self.chave, resultado="erro")
+            registrar_erro("fallback_navegador_falhou", e, fonte=self.chave)
+            if falha: raise falha
+            return []
+
+    def _travadas(self):
+        """Raspagens rodando há mais que o orçamento da fonte: ocupam thread, mas a busca já desistiu delas."""
+        limite = time.monotonic() - self.timeout
+        with self._executor_lock: return sum(1 for inicio in self._rodando.values() if inicio < limite)
+
+    def iniciar(self, termo):
+        """
+        Agenda `buscar` no pool da fonte, sem bloquear quem chama, e retorna um Future de
+        (itens, duracao, estado, erro). Com todas as threads presas em raspagens que já estouraram
+        o orçamento, volta na hora com "ocupada"; com o disjuntor aberto, "pulada". Se não houver
+        thread livre a raspagem espera na fila da própria fonte; quem chama cancela o Future no
+        prazo (ver buscar_em_fontes). Demais estados: "limitada" (sem ficha a tempo), "erro", "ok", "vazio".
+        """
+        if not self.disjuntor.permite(): return _resolvido(([], 0.0, "pulada", None))
+        if self._travadas() >= max(1, self.concorrencia):
+            self.disjuntor.desistir()
+            return _resolvido(([], 0.0, "ocupada", None))
+        agendado = time.monotonic()
+        # copy_context leva o trace da requisição para a thread da fonte.
+        futuro = self._obter_executor().submit(contextvars.copy_context().run, self._executar, termo, agendado)
+        # Cancelada ainda na fila: devolve a vaga de teste do disjuntor, se era ela.
+        futuro.add_done_callback(lambda f: f.cancelled() and self.disjuntor.desistir())
+        return futuro
+
+    def _executar(self, termo, agendado):
+        """Roda numa thread da fonte. Raspagem que estoura o orçamento conta como falha no disjuntor."""
+        inicio = time.monotonic()
+        if not self.balde.consumir(max(0.0, self.timeout - (inicio - agendado))):
+            self.disjuntor.desistir()
+            return [], time.monotonic() - agendado, "limitada", None
+        chave = object()
+        with self._executor_lock: self._rodando[chave] = inicio
+        try:
+            itens = self.buscar(termo) or []
+        except Exception as e:
+            registrar_erro("fonte_falhou", e, detalhe=True, fonte=self.chave)
+            self.disjuntor.falha()
+            return [], time.monotonic() - agendado, "erro", str(e)
+        finally:
+            with self._executor_lock: del self._rodando[chave]
+        duracao = time.monotonic() - inicio
+        if duracao > self.timeout: self.disjuntor.falha()
+        else: self.disjuntor.sucesso()
+        return itens, time.monotonic() - agendado, "ok" if itens else "vazio", None
+
+def _resolvido(valor):
+    futuro = Future()
+    futuro.set_result(valor)
+    return futuro
+
+FONTES = {}
+
+def registrar_fonte(classe):
+    """Decorador que instancia o adaptador e o põe no registro, na ordem de declaração."""
+    FONTES[classe.chave] = classe()
+    return classe
+
+@registrar_fonte
+class FonteG1(FonteNoticias):
+    chave, nome = "g1", "G1"
+
+    def buscar_requests(self, termo): return raspar_g1_requests(termo, limite=12)
+    def buscar_navegador(self, termo): return raspar_g1_navegador(termo)
+
+@registrar_fonte
+class FonteGoogleNoticias(FonteNoticias):
+    chave, nome = "google", "Google Notícias"
+
+    def buscar_requests(self, termo): return raspar_google_requests(termo, limite=12)
+    def buscar_navegador(self, termo): return raspar_google_navegador(termo)
+
+def selecionar_fontes(valores):
+    """
+    Traduz o parâmetro `sources`/`source` (chave ou nome, ex.: "g1", "Google") nas chaves do registro.
+    Sem valores retorna None (todas as fontes); valores sem correspondência resultam em lista vazia.
+    """
+    valores = [v.strip().lower() for v in valores or [] if v and v.strip()]
+    if not valores: return None
+    return [c for c, f in FONTES.items() if any(v == c or v in f.nome.lower() for v in valores)]
+
+# ---------------------------
+# Busca concorrente (fan-out)
+# ---------------------------
+SEARCH_DEADLINE = float(os.getenv("SEARCH_DEADLINE", "12"))
+
+def buscar_em_fontes(termo, fontes=None, deadline=None, ao_concluir=None):
+    """
+    Roda as fontes escolhidas (None = todas) em paralelo. Cada fonte tem como prazo o menor entre
+    `deadline` e o orçamento dela; quem não termina a tempo fica de fora (resultado parcial).
+    `ao_concluir(chave, itens, status)` é chamado assim que cada fonte termina (ou estoura o prazo).
+    Retorna (resultados_por_fonte, status_por_fonte), na ordem do registro FONTES.
+    """
+    chaves = [c for c in FONTES if fontes is None or c in fontes]
+    if deadline is None: deadline = SEARCH_DEADLINE
+    inicio = time.monotonic()
+    futures = {FONTES[chave].iniciar(termo): chave for chave in chaves}
+    prazos = {chave: min(deadline, FONTES[chave].timeout) for chave in chaves}
+    resultados, status = {}, {}
+
+    def concluir(chave, itens, estado, duracao):
+        resultados[chave] = itens
+        status[chave] = {"fonte": FONTES[chave].nome, "status": estado, "tempo": round(duracao, 3), "total": len(itens)}
+        FONTE_SEGUNDOS.observar(duracao, fonte=chave, estado=estado)
+        if estado not in ("ok", "vazio"): FONTE_FALHAS_TOTAL.inc(fonte=chave, estado=estado)
+        if ao_concluir: ao_concluir(chave, itens, status[chave])
+
+    pendentes = set(futures)
+    while pendentes:
+        decorrido = time.monotonic() - inicio
+        for fut in [f for f in pendentes if prazos[futures[f]] <= decorrido and not f.done()]:
+            pendentes.discard(fut)
+            # Ainda na fila da fonte (nenhuma thread livre no prazo): sai da fila e conta como ocupada.
+            concluir(futures[fut], [], "ocupada" if fut.cancel() else "timeout", decorrido)
+        if not pendentes: break
+        espera = min(prazos[futures[f]] for f in pendentes) - decorrido
+        prontos, _ = wait(pendentes, timeout=max(0.0, espera), return_when=FIRST_COMPLETED)
+        for fut in prontos:
+            pendentes.discard(fut)
+            itens, duracao, estado, _ = fut.result()
+            concluir(futures[fut], itens, estado, duracao)
+    resultados = {c: resultados[c] for c in chaves}
+    status = {c: status[c] for c in chaves}
+    registrar("busca_fontes", termo=termo, segundos=round(time.monotonic() - inicio, 3), fontes={c: s["status"] for c, s in status.items()})
+    return resultados, status
+
+# ---------------------------
+# Agrupamento de notícias quase repetidas
+# ---------------------------
+AGRUPAR_DISTANCIA = int(os.getenv("AGRUPAR_DISTANCIA", "8"))         # bits de diferença no SimHash do título
+AGRUPAR_MIN_CARACTERES = int(os.getenv("AGRUPAR_MIN_CARACTERES", "16"))  # título mais curto só agrupa pelo link
+_MASCARA_64 = (1 << 64) - 1
+_RE_SUFIXO_AMP = re.compile(r"(/amp|\.amp)?/*$")
+# " - Folha", " | g1", " — Estadão": o veículo que o Google cola no fim do título (até 4 palavras).
+_RE_SUFIXO_VEICULO = re.compile(r"\s+[-–—|]\s+[^-–—|\s]+(?:\s+[^-–—|\s]+){0,3}\s*$")
+_RE_NUMERO = re.compile(r"\d+")
+
+def _sem_veiculo(titulo):
+    return _RE_SUFIXO_VEICULO.sub("", titulo or "")
+
+def _numeros_titulo(titulo):
+    """Números do título: "concurso 2700" e "concurso 2701" são notícias diferentes, por mais parecido que seja o resto."""
+    return frozenset(_RE_NUMERO.findall(_sem_veiculo(titulo)))
+
+def _chave_link(link):
+    """Link canônico sem "www.", barra final nem sufixo AMP: variações do mesmo endereço caem juntas."""
+    partes = urlsplit(link or "")
+    host = partes.netloc.lower()
+    if host.startswith("www."): host = host[4:]
+    return host + _RE_SUFIXO_AMP.sub("", partes.path)
+
+@lru_cache(maxsize=LINKS_CACHE_MAX)
+def _hash_64(texto):
+    return int.from_bytes(hashlib.blake2b(texto.encode("utf-8"), digest_size=8).digest(), "big")
+
+def simhash_titulo(titulo):
+    """
+    SimHash de 64 bits do título normalizado (sem o " - Veículo" do fim, acento, caixa e pontuação)
+    sobre trechos de 4 letras, que aguentam palavras grudadas ("g1Fraude", "sulFolha") melhor que
+    palavras inteiras. None se o título for curto demais para a assinatura ser confiável.
+    """
+    texto = "".join(re.findall(r"[a-z0-9]+", _sem_acentos(_sem_veiculo(titulo).lower())))
+    if len(texto) < AGRUPAR_MIN_CARACTERES: return None
+    # Soma "vertical" dos hashes: planos[j] guarda o bit j da contagem de uns em cada uma das 64
+    # posições, somando 64 posições por operação em vez de uma por vez.
+    planos, total = [], 0
+    for trecho in {texto[i:i + 4] for i in range(len(texto) - 3)}:
+        total += 1
+        vai_um = _hash_64(trecho)
+        for j in range(len(planos)):
+            planos[j], vai_um = planos[j] ^ vai_um, planos[j] & vai_um
+            if not vai_um: break
+        if vai_um: planos.append(vai_um)
+    # Bit da assinatura = 1 onde a contagem passa da metade (comparação do plano mais alto ao mais baixo).
+    metade = total // 2
+    maior, igual = 0, _MASCARA_64
+    for j in range(max(len(planos), metade.bit_length()) - 1, -1, -1):
+        plano = planos[j] if j < len(planos) else 0
+        if (metade >> j) & 1: igual &= plano
+        else:
+            maior |= igual & plano
+            igual &= ~plano & _MASCARA_64
+    return maior
+
+class AgrupadorNoticias:
+    """
+    Junta a mesma notícia vinda de fontes diferentes (ou com variações do link) num grupo só:
+    mesmo link canônico ou títulos a até `distancia` bits de SimHash e com os mesmos números
+    (concurso, placar, ano). A primeira que chega fica
+    como representante e as outras vão para `alternativas` dela. O LSH divide a assinatura em
+    `distancia + 1` faixas; duas assinaturas tão próximas coincidem em pelo menos uma, então só
+    quem divide um balde é comparado e o custo fica perto de linear.
+    """
+    def __init__(self, distancia=None):
+        self.distancia = AGRUPAR_DISTANCIA if distancia is None else distancia
+        faixas = min(64, self.distancia + 1)
+        limites = [64 * i // faixas for i in range(faixas + 1)]
+        self._faixas = [(ini, (1 << (fim - ini)) - 1) for ini, fim in zip(limites, limites[1:])]
+        self._por_link = {}
+        self._baldes = {}
+
+    def adicionar(self, noticia):
+        """True se a notícia abriu um grupo (é representante); False se entrou como alternativa de outra."""
+        chave = _chave_link(noticia.get("link", ""))
+        assinatura = simhash_titulo(noticia.get("titulo", ""))
+        numeros = _numeros_titulo(noticia.get("titulo", ""))
+        grupo = self._por_link.get(chave)
+        if grupo is None and assinatura is not None: grupo = self._parecida(assinatura, numeros)
+        if grupo is not None:
+            self._por_link.setdefault(chave, grupo)
+            alternativa = {"titulo": noticia.get("titulo", ""), "link": noticia.get("link", ""), "fonte": noticia.get("fonte", "")}
+            repetida = (alternativa["link"], alternativa["fonte"]) == (grupo.get("link"), grupo.get("fonte"))
+            if not repetida and alternativa not in grupo["alternativas"]: grupo["alternativas"].append(alternativa)
+            return False
+        noticia["alternativas"] = []
+        self._por_link[chave] = noticia
+        if assinatura is not None:
+            for ini, mascara in self._faixas:
+                self._baldes.setdefault((ini, (assinatura >> ini) & mascara), []).append((assinatura, numeros, noticia))
+        return True
+
+    def _parecida(self, assinatura, numeros):
+        for ini, mascara in self._faixas:
+            for outra, outros_numeros, noticia in self._baldes.get((ini, (assinatura >> ini) & mascara), ()):
+                if outros_numeros == numeros and bin(assinatura ^ outra).count("1") <= self.distancia: return noticia
+        return None
+
+# ---------------------------
+# Gravação no banco
+# ---------------------------
+def _sem_coluna(tabela, coluna):
+    return ("SELECT COUNT(*) = 0 FROM information_schema.COLUMNS "
+            f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = '{tabela}' AND COLUMN_NAME = '{coluna}'")
+
+def _sem_indice(tabela, indice):
+    return ("SELECT COUNT(*) = 0 FROM information_schema.STATISTICS "
+            f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = '{tabela}' AND INDEX_NAME = '{indice}'")
+
+# Migrações versionadas do schema; cada versão roda uma única vez (registrada em schema_migrations).
+# O MySQL confirma cada DDL sozinho, então uma versão que falha no meio fica pela metade: todo passo
+# precisa poder rodar de novo. Passo (sql, condicao) só roda se a consulta `condicao` der verdadeiro.
+MIGRACOES = [
+    (1, "noticias: link_hash único por termo e índices de consulta", [
+        ("ALTER TABLE noticias ADD COLUMN link_hash CHAR(40) NULL", _sem_coluna("noticias", "link_hash")),
+        "UPDATE noticias SET link_hash = SHA1(link) WHERE link_hash IS NULL",
+        # Buscas repetidas empilharam linhas iguais: fica só a mais antiga antes de criar a chave única.
+        "DELETE n1 FROM noticias n1 JOIN noticias n2 ON n1.termo <=> n2.termo AND n1.link_hash = n2.link_hash AND n1.id > n2.id",
+        ("ALTER TABLE noticias ADD UNIQUE KEY uq_noticias_termo_link (termo, link_hash)", _sem_indice("noticias", "uq_noticias_termo_link")),
+        ("ALTER TABLE noticias ADD INDEX idx_noticias_termo_data (termo, data_criacao)", _sem_indice("noticias", "idx_noticias_termo_data")),
+        ("ALTER TABLE noticias ADD INDEX idx_noticias_fonte (fonte)", _sem_indice("noticias", "idx_noticias_fonte")),
+    ]),
+    (2, "sentimento_diario: contagens por termo, fonte e dia", [
+        """CREATE TABLE IF NOT EXISTS sentimento_diario (
+            termo VARCHAR(255) NOT NULL,
+            fonte VARCHAR(255) NOT NULL,
+            dia DATE NOT NULL,
+            positivo INT NOT NULL DEFAULT 0,
+            negativo INT NOT NULL DEFAULT 0,
+            neutro INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (termo, fonte, dia),
+            INDEX idx_sentimento_diario_dia (dia)
+        )""",
+        # Carga inicial com o histórico que já existe; daqui em diante salvar_no_banco mantém as contagens.
+        """INSERT INTO sentimento_diario (termo, fonte, dia, positivo, negativo, neutro)
+            SELECT COALESCE(termo, ''), COALESCE(fonte, ''), DATE(data_criacao),
+                   SUM(sentimento = 'positivo'), SUM(sentimento = 'negativo'), SUM(sentimento NOT IN ('positivo', 'negativo'))
+            FROM noticias GROUP BY COALESCE(termo, ''), COALESCE(fonte, ''), DATE(data_criacao)
+            ON DUPLICATE KEY UPDATE positivo = VALUES(positivo), negativo = VALUES(negativo), neutro = VALUES(neutro)""",
+    ]),
+    (3, "termos_monitorados: termos pré-aquecidos pelo crawler", [
+        """CREATE TABLE IF NOT EXISTS termos_monitorados (
+            termo VARCHAR(255) PRIMARY KEY,
+            ativo TINYINT(1) NOT NULL DEFAULT 1,
+            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+    ]),
+    (4, "noticias: índice FULLTEXT dos títulos para a busca no histórico", [
+        ("ALTER TABLE noticias ADD FULLTEXT INDEX ft_noticias_titulo (titulo)", _sem_indice("noticias", "ft_noticias_titulo")),
+    ]),
+]
+GRAVACAO_FILA_MAX = int(os.getenv("GRAVACAO_FILA_MAX", "100"))
+_schema_pronto = False
+
+def aplicar_migracoes(conexao):
+    """
+    Aplica as migrações pendentes. Um lock nomeado evita que dois workers migrem ao mesmo tempo:
+    sem o lock em 30s levanta TimeoutError e nada é aplicado.
+    """
+    with conexao.cursor() as cursor:
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            versao INT PRIMARY KEY,
+            descricao VARCHAR(255),
+            aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """)
+        cursor.execute("SELECT GET_LOCK('mop_migracoes', 30)")
+        if (cursor.fetchone() or (0,))[0] != 1: raise TimeoutError("lock de migração ocupado por outro processo")
+        try:
+            cursor.execute("SELECT versao FROM schema_migrations")
+            aplicadas = {row[0] for row in cursor.fetchall()}
+            for versao, descricao, comandos in MIGRACOES:
+                if versao in aplicadas: continue
+                registrar("migracao", versao=versao, descricao=descricao)
+                for passo in comandos:
+                    sql, condicao = passo if isinstance(passo, tuple) else (passo, None)
+                    if condicao:
+                        cursor.execute(condicao)
+                        if not cursor.fetchone()[0]: continue
+                    cursor.execute(sql)
+                cursor.execute("INSERT INTO schema_migrations (versao, descricao) VALUES (%s, %s)", (versao, descricao))
+                conexao.commit()
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK('mop_migracoes')")
+    return [v for v, _, _ in MIGRACOES]
+
+def garantir_schema(conexao):
+    """Aplica as migrações na primeira vez que o processo usa o banco."""
+    global _schema_pronto
+    if not _schema_pronto:
+        aplicar_migracoes(conexao)
+        _schema_pronto = True
+
+_COLUNA_SENTIMENTO = {"positivo": 0, "negativo": 1}  # o resto conta como neutro, igual à carga inicial
+
+def _variacoes_agregado(existentes, linhas, hoje, termo):
+    """
+    Quanto cada (fonte, dia) do termo muda com o lote: notícia nova soma no dia de hoje; notícia
+    que já existia e mudou de fonte/sentimento sai da contagem antiga e entra na nova, no dia
+    em que foi gravada pela primeira vez.
+    """
+    variacoes = {}
+    def somar(fonte, dia, sentimento, valor):
+        contagem = variacoes.setdefault((fonte or "", dia), [0, 0, 0])
+        contagem[_COLUNA_SENTIMENTO.get(sentimento, 2)] += valor
+    for _, _, link_hash, fonte, sentimento, _ in linhas:
+        anterior = existentes.get(link_hash)
+        if anterior is None: dia = hoje
+        else:
+            fonte_antes, sentimento_antes, dia = anterior
+            if (fonte_antes or "", sentimento_antes) == (fonte or "", sentimento): continue
+            somar(fonte_antes, dia, sentimento_antes, -1)
+        somar(fonte, dia, sentimento, +1)
+        existentes[link_hash] = (fonte, sentimento, dia)
+    return [(termo or "", fonte, dia, *contagem) for (fonte, dia), contagem in variacoes.items() if any(contagem)]
+
+def salvar_no_banco(resultados, termo, tentativas=2):
+    """
+    Grava o lote inteiro num único INSERT multi-linha; links já salvos para o termo são atualizados.
+    Na mesma transação atualiza sentimento_diario com a diferença que o lote causou, então as
+    contagens por termo/fonte/dia nunca precisam varrer `noticias`.
+    """
     if not resultados: return
-    conexao = conectar_banco()
-    if not conexao: return
     try:
+        faltando = [n["titulo"] for n in resultados if not n.get("sentimento")]
+        calculados = iter(analisar_sentimentos(faltando))
+        linhas = []
+        for noticia in resultados:
+            sentimento = noticia.get("sentimento") or next(calculados)
+            link = noticia["link"]
+            linhas.append((noticia["titulo"], link, hashlib.sha1(link.encode("utf-8")).hexdigest(), noticia.get("fonte",""), sentimento, termo))
+        inicio = time.perf_counter()
+        with obter_conexao() as conexao:
+            if not conexao: return
+            garantir_schema(conexao)
+            conexao.begin()
+            with conexao.cursor() as cursor:
+                # FOR UPDATE trava os links do lote: outro worker gravando o mesmo termo espera
+                # (ou cai em deadlock e tenta de novo), e nenhuma notícia é contada duas vezes.
+                cursor.execute(f"""
+                    SELECT link_hash, fonte, sentimento, DATE(data_criacao) FROM noticias
+                    WHERE termo = %s AND link_hash IN ({", ".join(["%s"] * len(linhas))}) FOR UPDATE
+                """, [termo] + [l[2] for l in linhas])
+                existentes = {row[0]: row[1:] for row in cursor.fetchall()}
+                cursor.execute("SELECT CURDATE()")
+                hoje = cursor.fetchone()[0]
+                cursor.executemany("""
+                    INSERT INTO noticias (titulo, link, link_hash, fonte, sentimento, termo)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE titulo=VALUES(titulo), fonte=VALUES(fonte), sentimento=VALUES(sentimento)
+                """, linhas)
+                variacoes = _variacoes_agregado(existentes, linhas, hoje, termo)
+                if variacoes:
+                    cursor.executemany("""
+                        INSERT INTO sentimento_diario (termo, fonte, dia, positivo, negativo, neutro)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE positivo=positivo+VALUES(positivo), negativo=negativo+VALUES(negativo), neutro=neutro+VALUES(neutro)
+                    """, variacoes)
+            conexao.commit()
+        ETAPA_SEGUNDOS.observar(time.perf_counter() - inicio, etapa="banco_gravacao")
+    except Exception as e:
+        pymysql = sys.modules.get("pymysql")
+        deadlock = pymysql is not None and isinstance(e, pymysql.err.OperationalError) and e.args and e.args[0] == 1213
+        if deadlock and tentativas > 1:  # o MySQL já desfez a transação
+            return salvar_no_banco(resultados, termo, tentativas - 1)
+        registrar_erro("gravacao_falhou", e, detalhe=True, termo=termo)
+
+_fila_gravacao = None
+_fila_gravacao_pid = None
+_fila_gravacao_lock = threading.Lock()
+
+def _gravador():
+    fila = _fila_gravacao
+    while True:
+        resultados, termo, trace = fila.get()
+        _trace_atual.set(trace)
+        try: salvar_no_banco(resultados, termo)
+        finally: fila.task_done()
+
+def salvar_no_banco_async(resultados, termo):
+    """Enfileira a gravação para uma thread de fundo; a requisição não espera o banco."""
+    global _fila_gravacao, _fila_gravacao_pid
+    if not resultados: return
+    with _fila_gravacao_lock:
+        # Threads não sobrevivem a um fork: cada processo sobe o seu gravador.
+        if _fila_gravacao is None or _fila_gravacao_pid != os.getpid():
+            _fila_gravacao = queue.Queue(maxsize=GRAVACAO_FILA_MAX)
+            _fila_gravacao_pid = os.getpid()
+            threading.Thread(target=_gravador, name="gravador-noticias", daemon=True).start()
+    try: _fila_gravacao.put_nowait(([dict(r) for r in resultados], termo, _trace_atual.get()))
+    except queue.Full: registrar("fila_gravacao_cheia", logging.WARNING, termo=termo, descartadas=len(resultados))
+
+# ---------------------------
+# Tendência de sentimento
+# ---------------------------
+TENDENCIA_MAX_DIAS = int(os.getenv("TENDENCIA_MAX_DIAS", "730"))
+
+def tendencia_sentimento(termo, dias=30, fonte=None):
+    """
+    Série diária de sentimento lida de sentimento_diario (nunca de `noticias`): termo vazio soma
+    todos os termos, `fonte` (chave ou nome, como em selecionar_fontes) restringe a uma fonte.
+    Retorna None sem banco.
+    """
+    filtros, params = ["dia >= CURDATE() - INTERVAL %s DAY"], [max(0, dias - 1)]
+    if termo:
+        filtros.append("termo = %s")
+        params.append(termo)
+    fontes = selecionar_fontes([fonte])
+    if fontes is not None:
+        nomes = [FONTES[c].nome for c in fontes] or [""]
+        filtros.append(f"fonte IN ({', '.join(['%s'] * len(nomes))})")
+        params += nomes
+    with obter_conexao() as conexao:
+        if not conexao: return None
+        garantir_schema(conexao)
         with conexao.cursor() as cursor:
-            for noticia in resultados:
-                sentimento = analisar_sentimento(noticia["titulo"])
-                try:
-                    cursor.execute("""
-                        INSERT INTO noticias (titulo, link, fonte, sentimento, termo)
-                        VALUES (%s, %s, %s, %s, %s)
-                    """, (noticia["titulo"], noticia["link"], noticia.get("fonte",""), sentimento, termo))
-                except Exception as e: pass
-        conexao.commit()
-        conexao.close()
+            cursor.execute(f"""
+                SELECT dia, fonte, SUM(positivo), SUM(negativo), SUM(neutro) FROM sentimento_diario
+                WHERE {" AND ".join(filtros)} GROUP BY dia, fonte ORDER BY dia
+            """, params)
+            linhas = cursor.fetchall()
+    por_dia, por_fonte = {}, {}
+    total = {"positivo": 0, "negativo": 0, "neutro": 0}
+    for dia, nome_fonte, positivo, negativo, neutro in linhas:
+        contagem = {"positivo": int(positivo), "negativo": int(negativo), "neutro": int(neutro)}
+        item = por_dia.setdefault(dia.isoformat(), {"dia": dia.isoformat(), "positivo": 0, "negativo": 0, "neutro": 0})
+        acumulado = por_fonte.setdefault(nome_fonte, {"positivo": 0, "negativo": 0, "neutro": 0})
+        for k, v in contagem.items():
+            item[k] += v
+            acumulado[k] += v
+            total[k] += v
+    for item in por_dia.values(): item["total"] = item["positivo"] + item["negativo"] + item["neutro"]
+    return {"termo": termo, "dias": dias, "fonte": fonte, "serie": list(por_dia.values()), "por_fonte": por_fonte, "total": total}
+
+# ---------------------------
+# Busca no histórico
+# ---------------------------
+HISTORICO_MEIA_VIDA = float(os.getenv("HISTORICO_MEIA_VIDA", "30"))  # dias para a relevância de uma notícia cair pela metade
+_RE_MES = re.compile(r"^(\d{4})-(\d{2})$")
+
+def buscar_historico(consulta, fontes=None, sentimento=None, mes=None, pagina=1, por_pagina=12):
+    """
+    Procura `consulta` nos títulos já gravados (índice FULLTEXT de noticias), sem ir às fontes.
+    Ordena pela relevância do MATCH decaindo com a idade (meia-vida HISTORICO_MEIA_VIDA dias) e
+    conta facetas de sentimento, fonte e mês sobre o mesmo filtro. Um link gravado para vários
+    termos aparece uma vez só. `fontes` são chaves do registro FONTES; `mes` é "AAAA-MM".
+    Retorna None sem banco.
+    """
+    filtros, params = ["MATCH(titulo) AGAINST (%s IN NATURAL LANGUAGE MODE)"], [consulta]
+    if fontes is not None:
+        nomes = [FONTES[c].nome for c in fontes] or [""]
+        filtros.append(f"fonte IN ({', '.join(['%s'] * len(nomes))})")
+        params += nomes
+    if sentimento:
+        filtros.append("sentimento = %s")
+        params.append(sentimento)
+    casa = _RE_MES.match(mes or "")
+    if casa and 1 <= int(casa.group(2)) <= 12:
+        ano, numero = int(casa.group(1)), int(casa.group(2))
+        filtros.append("data_criacao >= %s AND data_criacao < %s")
+        params += [f"{ano:04d}-{numero:02d}-01", f"{ano + numero // 12:04d}-{numero % 12 + 1:02d}-01"]
+    onde = " AND ".join(filtros)
+    with obter_conexao() as conexao:
+        if not conexao: return None
+        garantir_schema(conexao)
+        with conexao.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT MAX(titulo), MAX(link), MAX(fonte), MAX(sentimento), MAX(data_criacao),
+                       MAX(MATCH(titulo) AGAINST (%s IN NATURAL LANGUAGE MODE)) AS relevancia,
+                       MAX(MATCH(titulo) AGAINST (%s IN NATURAL LANGUAGE MODE))
+                           * POW(0.5, TIMESTAMPDIFF(HOUR, MAX(data_criacao), NOW()) / %s) AS pontuacao
+                FROM noticias WHERE {onde} GROUP BY link_hash
+                ORDER BY pontuacao DESC
+                LIMIT %s OFFSET %s
+            """, [consulta, consulta, 24 * HISTORICO_MEIA_VIDA] + params + [por_pagina, (pagina - 1) * por_pagina])
+            linhas = cursor.fetchall()
+            cursor.execute(f"""
+                SELECT 'total', '', COUNT(DISTINCT link_hash) FROM noticias WHERE {onde}
+                UNION ALL SELECT 'sentimento', sentimento, COUNT(DISTINCT link_hash) FROM noticias WHERE {onde} GROUP BY sentimento
+                UNION ALL SELECT 'fonte', fonte, COUNT(DISTINCT link_hash) FROM noticias WHERE {onde} GROUP BY fonte
+                UNION ALL SELECT 'mes', DATE_FORMAT(data_criacao, '%%Y-%%m'), COUNT(DISTINCT link_hash) FROM noticias WHERE {onde}
+                    GROUP BY DATE_FORMAT(data_criacao, '%%Y-%%m')
+            """, params * 4)
+            contagens = cursor.fetchall()
+    facetas = {"sentimento": {}, "fonte": {}, "mes": {}}
+    total = 0
+    for faceta, valor, quantidade in contagens:
+        if faceta == "total": total = int(quantidade)
+        else: facetas[faceta][valor or ""] = int(quantidade)
+    facetas["mes"] = dict(sorted(facetas["mes"].items(), reverse=True))
+    resultados = [{"titulo": titulo, "link": link, "fonte": fonte or "", "sentimento": sentimento_linha or "neutro",
+                   "data": data.isoformat() if data else None, "relevancia": round(float(relevancia or 0), 3)}
+                  for titulo, link, fonte, sentimento_linha, data, relevancia, _ in linhas]
+    sentimentos = {k: facetas["sentimento"].get(k, 0) for k in ("positivo", "negativo", "neutro")}
+    return {"resultados": resultados, "total": total, "sentimentos": sentimentos, "facetas": facetas}
+
+# ---------------------------
+# Cache de resultados
+# ---------------------------
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+RESULT_CACHE_STALE = float(os.getenv("RESULT_CACHE_STALE", "1800"))  # janela extra servindo dado velho enquanto revalida
+RESULT_CACHE_PARCIAL_TTL = float(os.getenv("RESULT_CACHE_PARCIAL_TTL", "60"))  # busca com fonte em erro/timeout: fresca por menos tempo
+RESULT_CACHE_MAX = int(os.getenv("RESULT_CACHE_MAX", "256"))
+RESULT_CACHE_SQLITE = os.getenv("RESULT_CACHE_SQLITE", "")  # arquivo compartilhado entre os workers do gunicorn
+
+def normalizar_termo(termo):
+    return " ".join(_sem_acentos(termo or "").lower().split())
+
+def chave_busca(termo, fontes=None):
+    return normalizar_termo(termo) + "|" + ",".join(sorted(FONTES if fontes is None else fontes))
+
+class BackendSQLite:
+    """Armazena as buscas num arquivo SQLite para que todos os workers vejam as mesmas entradas."""
+    def __init__(self, caminho, maximo):
+        self.caminho = caminho
+        self.maximo = maximo
+        with self._conectar() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("CREATE TABLE IF NOT EXISTS cache_resultados (chave TEXT PRIMARY KEY, valor TEXT NOT NULL, criado_em REAL NOT NULL, acessado_em REAL NOT NULL)")
+            con.execute("CREATE INDEX IF NOT EXISTS idx_cache_acessado ON cache_resultados (acessado_em)")
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=5)
+
+    def get(self, chave):
+        try:
+            with self._conectar() as con:
+                row = con.execute("SELECT valor, criado_em FROM cache_resultados WHERE chave=?", (chave,)).fetchone()
+                if not row: return None
+                con.execute("UPDATE cache_resultados SET acessado_em=? WHERE chave=?", (time.time(), chave))
+            return json.loads(row[0]), row[1]
+        except Exception as e:
+            registrar_erro("cache_sqlite_falhou", e, operacao="leitura")
+            return None
+
+    def set(self, chave, valor, criado_em):
+        try:
+            with self._conectar() as con:
+                con.execute("INSERT OR REPLACE INTO cache_resultados (chave, valor, criado_em, acessado_em) VALUES (?, ?, ?, ?)",
+                            (chave, json.dumps(valor, ensure_ascii=False), criado_em, criado_em))
+                con.execute("DELETE FROM cache_resultados WHERE chave IN (SELECT chave FROM cache_resultados ORDER BY acessado_em DESC LIMIT -1 OFFSET ?)", (self.maximo,))
+        except Exception as e:
+            registrar_erro("cache_sqlite_falhou", e, operacao="escrita")
+
+class CacheResultados:
+    """
+    Cache LRU das buscas já montadas (mescladas, deduplicadas e com sentimento).
+    Até `ttl` a entrada é fresca; até `ttl + stale` ainda é servida, mas pede revalidação.
+    """
+    def __init__(self, ttl, stale, maximo, backend=None):
+        self.ttl = ttl
+        self.stale = stale
+        self.maximo = maximo
+        self.backend = backend
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        """Retorna (valor, idade_em_segundos) ou (None, None)."""
+        agora = time.time()
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is not None: self._dados.move_to_end(chave)
+        # Entrada local vencida: outro processo (um worker ou o crawler) pode já ter gravado uma mais nova.
+        if self.backend is not None and (item is None or agora - item[1] > self.ttl):
+            compartilhado = self.backend.get(chave)
+            if compartilhado is not None and (item is None or compartilhado[1] > item[1]):
+                item = compartilhado
+                with self._lock: self._guardar(chave, item)
+        if item is None: return None, None
+        valor, criado_em = item
+        idade = agora - criado_em
+        if idade > self.ttl + self.stale: return None, None
+        return valor, idade
+
+    def set(self, chave, valor):
+        item = (valor, time.time())
+        with self._lock: self._guardar(chave, item)
+        if self.backend is not None: self.backend.set(chave, valor, item[1])
+
+    def _guardar(self, chave, item):
+        self._dados[chave] = item
+        self._dados.move_to_end(chave)
+        while len(self._dados) > self.maximo: self._dados.popitem(last=False)
+
+_cache_resultados = CacheResultados(RESULT_CACHE_TTL, RESULT_CACHE_STALE, RESULT_CACHE_MAX,
+                                    BackendSQLite(RESULT_CACHE_SQLITE, RESULT_CACHE_MAX) if RESULT_CACHE_SQLITE else None)
+
+def executar_busca(termo, fontes=None, progresso=None, salvar=None):
+    """
+    Raspa as fontes, agrupa as notícias quase repetidas e classifica o sentimento em lote.
+    Cada fonte é agrupada e classificada assim que termina (só as representantes vão para o
+    sentimento e para o banco), e `progresso(evento)` recebe: "fonte" (status da fonte),
+    "artigos" (as notícias inéditas dela, já com sentimento, e a contagem parcial) e
+    "sentimento" (contagem final). `salvar` (padrão: SAVE_TO_DB=1) manda o lote para o banco.
+    """
+    inicio = time.perf_counter()
+    def avisar(evento):
+        if progresso: progresso(evento)
+    parciais = {"positivo": 0, "negativo": 0, "neutro": 0}
+    agrupador = AgrupadorNoticias()
+    representantes = set()
+    def ao_concluir(chave, itens, status):
+        novos = [r for r in itens if agrupador.adicionar(r)]
+        for r, sentimento in zip(novos, analisar_sentimentos([r.get("titulo","") for r in novos])):
+            r["sentimento"] = sentimento
+            representantes.add(id(r))
+            parciais[sentimento] += 1
+        avisar({"etapa": "fonte", "chave": chave, **status})
+        if novos: avisar({"etapa": "artigos", "chave": chave, "artigos": novos, "sentimentos": dict(parciais)})
+    por_fonte, fontes_status = buscar_em_fontes(termo, fontes, ao_concluir=ao_concluir)
+    # Representantes na ordem das fontes no registro, como antes do agrupamento.
+    resultados = [r for itens in por_fonte.values() for r in itens if id(r) in representantes]
+    sentimentos = {"positivo": 0, "negativo": 0, "neutro": 0}
+    for r in resultados: sentimentos[r["sentimento"]] += 1
+    avisar({"etapa": "sentimento", "total": len(resultados), "sentimentos": dict(sentimentos)})
+    if salvar is None: salvar = os.getenv('SAVE_TO_DB', '0') == '1'
+    if salvar: salvar_no_banco_async(resultados, termo)
+    ETAPA_SEGUNDOS.observar(time.perf_counter() - inicio, etapa="busca")
+    return {"termo": termo, "resultados": resultados, "sentimentos": sentimentos, "fontes_status": fontes_status, "gerado_em": time.time()}
+
+# Qualquer outro estado (erro, timeout, ocupada, pulada, limitada) deixa a busca parcial: uma fonte
+# em pausa volta em FONTE_PAUSA, então a busca sem ela não pode ficar fresca pelo TTL inteiro.
+_ESTADOS_FINAIS = ("ok", "vazio")
+
+def _busca_completa(busca):
+    return all(s["status"] in _ESTADOS_FINAIS for s in busca["fontes_status"].values())
+
+def _busca_fresca(busca, idade):
+    # Resultado parcial também fica no cache e serve a paginação, mas fresco só por
+    # RESULT_CACHE_PARCIAL_TTL: depois disso a próxima leitura revalida, uma vez por janela.
+    return idade <= (_cache_resultados.ttl if _busca_completa(busca) else min(_cache_resultados.ttl, RESULT_CACHE_PARCIAL_TTL))
+
+def buscar_em_cache(termo, fontes=None):
+    """Retorna a busca em cache só se estiver fresca; senão None."""
+    busca, idade = _cache_resultados.get(chave_busca(termo, fontes))
+    if busca is not None and _busca_fresca(busca, idade): return busca
+    return None
+
+def _consultar_cache(termo, fontes=None, revalidar=True):
+    """
+    Lê o cache de resultados e conta acerto/velho/falha. Retorna (busca, "cache" | "stale"), ou
+    (None, None) sem entrada; entrada velha dispara a atualização em segundo plano se `revalidar`.
+    """
+    busca, idade = _cache_resultados.get(chave_busca(termo, fontes))
+    if busca is None:
+        CACHE_TOTAL.inc(cache="resultados", resultado="falha")
+        return None, None
+    if _busca_fresca(busca, idade):
+        CACHE_TOTAL.inc(cache="resultados", resultado="acerto")
+        return busca, "cache"
+    CACHE_TOTAL.inc(cache="resultados", resultado="velho")
+    if revalidar: fila_jobs().submeter(termo, fontes)
+    return busca, "stale"
+
+def buscar_resultados(termo, fontes=None, revalidar=True):
+    """
+    Busca com cache: entrada fresca volta direto; entrada velha (dentro da janela stale)
+    volta na hora e dispara uma atualização em segundo plano. Sem cache, a raspagem passa
+    pela fila de jobs, então requisições simultâneas do mesmo termo esperam um só job.
+    Com revalidar=False (páginas seguintes) a entrada velha volta sem disparar nada.
+    Retorna (busca, origem).
+    """
+    busca, origem = _consultar_cache(termo, fontes, revalidar)
+    if busca is not None: return busca, origem
+    job = fila_jobs().submeter(termo, fontes)
+    if job is None or not job.esperar(SEARCH_DEADLINE + 30) or job.resultado is None:
+        # Fila cheia ou job travado: raspa aqui mesmo em vez de devolver vazio.
+        busca = executar_busca(termo, fontes)
+        _cache_resultados.set(chave_busca(termo, fontes), busca)
+        return busca, "ao_vivo"
+    return job.resultado, "ao_vivo"
+
+# ---------------------------
+# Jobs de busca em segundo plano
+# ---------------------------
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "4"))
+JOBS_FILA_MAX = int(os.getenv("JOBS_FILA_MAX", "50"))   # jobs pendentes/rodando aceitos por processo
+JOBS_TTL = float(os.getenv("JOBS_TTL", "600"))          # por quanto tempo um job terminado pode ser consultado
+
+class JobBusca:
+    def __init__(self, termo, fontes, chave):
+        self.id = uuid.uuid4().hex
+        self.termo = termo
+        self.fontes = fontes
+        self.chave = chave
+        self.status = "na_fila"  # na_fila -> rodando -> concluido | erro
+        self.progresso = []
+        self.resultado = None
+        self.erro = None
+        self.criado_em = time.time()
+        self.terminado_em = None
+        self.trace = _trace_atual.get()  # trace de quem criou; pedidos repetidos entram no mesmo job
+        self._fim = threading.Event()
+        self._mudou = threading.Condition()
+
+    def esperar(self, timeout=None):
+        return self._fim.wait(timeout)
+
+    def avisar(self, evento):
+        with self._mudou:
+            self.progresso.append(evento)
+            self._mudou.notify_all()
+
+    def eventos_desde(self, inicio, timeout=None):
+        """Bloqueia até haver eventos depois de `inicio` ou o job terminar. Retorna (eventos, terminou)."""
+        with self._mudou:
+            self._mudou.wait_for(lambda: len(self.progresso) > inicio or self._fim.is_set(), timeout)
+            return self.progresso[inicio:], self._fim.is_set()
+
+    def terminar(self, resultado=None, erro=None):
+        with self._mudou:
+            self.resultado = resultado
+            self.erro = erro
+            self.status = "erro" if erro else "concluido"
+            self.terminado_em = time.time()
+            self._fim.set()
+            self._mudou.notify_all()
+
+    def para_json(self):
+        # Os artigos em si ficam de fora do polling; a lista sai paginada por /api/search.
+        progresso = [{k: v for k, v in e.items() if k != "artigos"} for e in list(self.progresso)]
+        dados = {"job_id": self.id, "termo": self.termo, "status": self.status, "progresso": progresso, "trace": self.trace,
+                 "criado_em": self.criado_em, "terminado_em": self.terminado_em}
+        if self.erro: dados["erro"] = self.erro
+        if self.resultado is not None:
+            dados["total"] = len(self.resultado["resultados"])
+            dados["sentimentos"] = self.resultado["sentimentos"]
+            dados["fontes_status"] = self.resultado["fontes_status"]
+        return dados
+
+class FilaJobs:
+    """
+    Fila local de buscas: um pool limitado de workers roda raspagem + sentimento.
+    Pedidos iguais (mesma chave de busca) enquanto um job está em andamento viram o mesmo job.
+    """
+    def __init__(self, workers, maximo, ttl):
+        self.workers = workers
+        self.maximo = maximo
+        self.ttl = ttl
+        self.pid = os.getpid()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job-busca")
+        self._jobs = {}
+        self._em_andamento = {}
+        self._lock = threading.Lock()
+
+    def submeter(self, termo, fontes=None):
+        """Retorna o job (novo ou o que já roda para a mesma busca), ou None se a fila estiver cheia."""
+        chave = chave_busca(termo, fontes)
+        with self._lock:
+            self._limpar()
+            job = self._em_andamento.get(chave)
+            if job is not None: return job
+            if len(self._em_andamento) >= self.maximo: return None
+            job = JobBusca(termo, fontes, chave)
+            self._jobs[job.id] = job
+            self._em_andamento[chave] = job
+        self._executor.submit(contextvars.copy_context().run, self._rodar, job)
+        return job
+
+    def obter(self, job_id):
+        with self._lock: return self._jobs.get(job_id)
+
+    def _rodar(self, job):
+        job.status = "rodando"
+        try:
+            busca = buscar_em_cache(job.termo, job.fontes)
+            if busca is None:
+                busca = executar_busca(job.termo, job.fontes, progresso=job.avisar)
+                _cache_resultados.set(job.chave, busca)
+            job.terminar(resultado=busca)
+        except Exception as e:
+            registrar_erro("job_falhou", e, detalhe=True, job=job.id, termo=job.termo)
+            job.terminar(erro=str(e))
+        finally:
+            with self._lock:
+                if self._em_andamento.get(job.chave) is job: del self._em_andamento[job.chave]
+
+    def _limpar(self):
+        limite = time.time() - self.ttl
+        for job_id in [j.id for j in self._jobs.values() if j.terminado_em and j.terminado_em < limite]:
+            del self._jobs[job_id]
+
+_fila_jobs = None
+_fila_jobs_lock = threading.Lock()
+
+def fila_jobs():
+    global _fila_jobs
+    if _fila_jobs is None or _fila_jobs.pid != os.getpid():
+        with _fila_jobs_lock:
+            if _fila_jobs is None or _fila_jobs.pid != os.getpid():
+                _fila_jobs = FilaJobs(JOBS_WORKERS, JOBS_FILA_MAX, JOBS_TTL)
+    return _fila_jobs
+
+# ---------------------------
+# Pré-aquecimento agendado (crawler)
+# ---------------------------
+# Processo à parte (`crawler` no Procfile). Para os workers web enxergarem o que ele grava no
+# cache, os dois precisam apontar RESULT_CACHE_SQLITE para o mesmo arquivo.
+CRAWLER_TERMOS = os.getenv("CRAWLER_TERMOS", "")                # termos fixos, separados por vírgula
+CRAWLER_INTERVALO = float(os.getenv("CRAWLER_INTERVALO", str(RESULT_CACHE_TTL * 0.8)))  # segundos entre raspagens do mesmo termo
+CRAWLER_JITTER = float(os.getenv("CRAWLER_JITTER", "0.1"))       # fração do intervalo sorteada para mais ou para menos
+CRAWLER_CONCORRENCIA = int(os.getenv("CRAWLER_CONCORRENCIA", "2"))  # termos raspando ao mesmo tempo (orçamento global)
+CRAWLER_RECARGA = float(os.getenv("CRAWLER_RECARGA", "60"))      # segundos entre releituras da lista de termos
+
+def termos_monitorados():
+    """Termos de CRAWLER_TERMOS mais os ativos na tabela termos_monitorados, sem repetir."""
+    termos = [t.strip() for t in CRAWLER_TERMOS.split(",") if t.strip()]
+    try:
+        with obter_conexao() as conexao:
+            if conexao:
+                with conexao.cursor() as cursor:
+                    cursor.execute("SELECT termo FROM termos_monitorados WHERE ativo = 1 ORDER BY criado_em")
+                    termos += [row[0] for row in cursor.fetchall()]
+    except Exception as e:
+        registrar_erro("termos_monitorados_falhou", e)
+    unicos = {}
+    for termo in termos: unicos.setdefault(normalizar_termo(termo), termo)
+    return [t for chave, t in unicos.items() if chave]
+
+class AquecedorCache:
+    """
+    Re-raspa cada termo monitorado a cada `intervalo` segundos (± `jitter` do intervalo, para os
+    termos não baterem nas fontes todos juntos), com no máximo `concorrencia` termos de uma vez.
+    Cada rodada vai para o cache de resultados e para a tabela noticias.
+    """
+    def __init__(self, intervalo, jitter, concorrencia):
+        self.intervalo = intervalo
+        self.jitter = jitter
+        self.concorrencia = max(1, concorrencia)
+        self._agenda = {}        # termo normalizado -> [próxima rodada (monotonic), termo]
+        self._rodando = set()
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parado = False
+        self._executor = ThreadPoolExecutor(max_workers=self.concorrencia, thread_name_prefix="crawler")
+
+    def _sortear(self, base):
+        return base + self.intervalo * random.uniform(-self.jitter, self.jitter)
+
+    def atualizar_termos(self, termos):
+        agora = time.monotonic()
+        atuais = {normalizar_termo(t): t for t in termos}
+        with self._lock:
+            for chave in [c for c in self._agenda if c not in atuais]: del self._agenda[chave]
+            for chave, termo in atuais.items():
+                # Termo novo entra logo, mas espalhado dentro da janela de jitter.
+                if chave not in self._agenda: self._agenda[chave] = [agora + random.uniform(0, self.intervalo * self.jitter), termo]
+
+    def _aquecer(self, chave, termo):
+        _trace_atual.set(novo_trace())
+        inicio = time.monotonic()
+        try:
+            busca = executar_busca(termo, salvar=False)
+            _cache_resultados.set(chave_busca(termo), busca)
+            salvar_no_banco(busca["resultados"], termo)
+            registrar("pre_aquecido", termo=termo, noticias=len(busca["resultados"]), segundos=round(time.monotonic() - inicio, 3))
+        except Exception as e:
+            registrar_erro("pre_aquecimento_falhou", e, detalhe=True, termo=termo)
+        finally:
+            with self._lock:
+                self._rodando.discard(chave)
+                if chave in self._agenda: self._agenda[chave][0] = self._sortear(inicio + self.intervalo)
+            self._acordar.set()
+
+    def parar(self, *_):
+        self._parado = True
+        self._acordar.set()
+
+    def rodar(self):
+        recarga = 0.0
+        while not self._parado:
+            agora = time.monotonic()
+            if agora >= recarga:
+                self.atualizar_termos(termos_monitorados())
+                recarga = agora + CRAWLER_RECARGA
+            with self._lock:
+                vencidos = sorted((quando, chave) for chave, (quando, _) in self._agenda.items() if quando <= agora and chave not in self._rodando)
+                for _, chave in vencidos[:self.concorrencia - len(self._rodando)]:
+                    self._rodando.add(chave)
+                    self._executor.submit(self._aquecer, chave, self._agenda[chave][1])
+                proxima = min([quando for chave, (quando, _) in self._agenda.items() if chave not in self._rodando] + [recarga])
+            self._acordar.wait(max(0.1, proxima - time.monotonic()))
+            self._acordar.clear()
+        self._executor.shutdown(wait=True)
+
+def rodar_crawler():
+    """Ponto de entrada do processo `crawler` (python main.py crawler)."""
+    registrar("crawler_iniciado", intervalo=CRAWLER_INTERVALO, jitter=CRAWLER_JITTER, concorrencia=CRAWLER_CONCORRENCIA)
+    if not RESULT_CACHE_SQLITE: registrar("crawler_sem_cache_compartilhado", logging.WARNING, detalhe="RESULT_CACHE_SQLITE não definido: o cache pré-aquecido fica só neste processo; só o banco é compartilhado")
+    try:
+        with obter_conexao() as conexao:
+            if conexao: aplicar_migracoes(conexao)
     except Exception as e:
-        print("Erro ao salvar no banco:", e)
+        registrar_erro("crawler_migracoes_falhou", e)
+    aquecedor = AquecedorCache(CRAWLER_INTERVALO, CRAWLER_JITTER, CRAWLER_CONCORRENCIA)
+    signal.signal(signal.SIGTERM, aquecedor.parar)
+    signal.signal(signal.SIGINT, aquecedor.parar)
+    aquecedor.rodar()
 
 # ---------------------------
 # Rotas
 # ---------------------------
+def carregar_perfil():
+    """
+    Estado do perfil (onboarding, tema, resultados por página) vive na sessão assinada:
+    o login grava e o onboarding atualiza. Só sessões antigas, sem o campo, vão ao banco — uma vez.
+    Retorna se o usuário já fez o onboarding.
+    """
+    if "fez_onboarding" in session: return session["fez_onboarding"]
+    try:
+        with obter_conexao() as conexao:
+            if not conexao: return True
+            with conexao.cursor() as cursor:
+                cursor.execute("SELECT tema, resultados_por_pagina, fez_onboarding FROM users WHERE id=%s", (session["user_id"],))
+                st = cursor.fetchone()
+    except Exception as e:
+        registrar_erro("perfil_falhou", e)
+        return True
+    if not st: return True
+    session["tema"] = st[0] or 'claro'
+    session["resultados"] = st[1] or 12
+    session["fez_onboarding"] = bool(st[2])
+    return session["fez_onboarding"]
+
 @app.route("/register", methods=["GET", "POST"])
 def register():
     if request.method == "POST":
@@ -348,28 +2274,26 @@ def register():
             flash("Preencha todos os campos.", "erro")
             return redirect(url_for("register"))
         
-        conexao = conectar_banco()
-        if not conexao:
-            flash("Erro crítico: Banco não conectado (ver logs).", "erro")
-            return redirect(url_for("register"))
-
         try:
-            with conexao.cursor() as cursor:
-                cursor.execute("SELECT id FROM users WHERE email=%s", (email,))
-                if cursor.fetchone():
-                    flash("Email já cadastrado!", "erro")
+            with obter_conexao() as conexao:
+                if not conexao:
+                    flash("Erro crítico: Banco não conectado (ver logs).", "erro")
                     return redirect(url_for("register"))
-                senha_hash = generate_password_hash(senha)
-                cursor.execute("INSERT INTO users (nome, email, senha) VALUES (%s, %s, %s)", (nome, email, senha_hash))
-            conexao.commit()
-            conexao.close()
+                with conexao.cursor() as cursor:
+                    cursor.execute("SELECT id FROM users WHERE email=%s", (email,))
+                    if cursor.fetchone():
+                        flash("Email já cadastrado!", "erro")
+                        return redirect(url_for("register"))
+                    senha_hash = generate_password_hash(senha)
+                    cursor.execute("INSERT INTO users (nome, email, senha) VALUES (%s, %s, %s)", (nome, email, senha_hash))
+                conexao.commit()
             flash("Cadastro realizado com sucesso! Faça login.", "sucesso")
             return redirect(url_for("login"))
         except Exception as e:
-            print("Erro ao cadastrar:", e)
+            registrar_erro("cadastro_falhou", e)
             flash(f"Erro ao cadastrar usuário: {e}", "erro")
             return redirect(url_for("register"))
-    return render_template("register.html")
+    return renderizar("register.html")
 
 @app.route("/login", methods=["GET", "POST"])
 def login():
@@ -380,16 +2304,14 @@ def login():
             flash("Preencha email e senha.", "erro")
             return redirect(url_for("login"))
 
-        conexao = conectar_banco()
-        if not conexao:
-            flash("Erro crítico: Banco não conectado (ver logs).", "erro")
-            return redirect(url_for("login"))
-
         try:
-            with conexao.cursor() as cursor:
-                cursor.execute("SELECT id, nome, senha, tema, resultados_por_pagina, fez_onboarding FROM users WHERE email=%s", (email,))
-                user = cursor.fetchone()
-            conexao.close()
+            with obter_conexao() as conexao:
+                if not conexao:
+                    flash("Erro crítico: Banco não conectado (ver logs).", "erro")
+                    return redirect(url_for("login"))
+                with conexao.cursor() as cursor:
+                    cursor.execute("SELECT id, nome, senha, tema, resultados_por_pagina, fez_onboarding FROM users WHERE email=%s", (email,))
+                    user = cursor.fetchone()
 
             if not user:
                 flash("Email ou senha incorretos!", "erro")
@@ -404,15 +2326,16 @@ def login():
             session['user_name'] = user_name
             session['tema'] = tema or 'claro'
             session['resultados'] = resultados_por_pagina or 12
+            session['fez_onboarding'] = bool(fez_onboarding)
 
             if fez_onboarding == 0: return redirect(url_for("onboarding"))
             flash(f"Bem-vindo(a), {user_name}!", "sucesso")
             return redirect(url_for("index"))
         except Exception as e:
-            print("Erro login:", e)
+            registrar_erro("login_falhou", e)
             flash("Erro ao fazer login.", "erro")
             return redirect(url_for("login"))
-    return render_template("login.html")
+    return renderizar("login.html")
 
 @app.route("/logout")
 def logout():
@@ -428,64 +2351,67 @@ def onboarding():
         tema = request.form.get("tema", "claro")
         try: resultados = int(request.form.get("resultados", 12))
         except: resultados = 12
-        conexao = conectar_banco()
-        if conexao:
-            try:
-                with conexao.cursor() as cursor:
-                    cursor.execute("UPDATE users SET fez_onboarding=1, tema=%s, resultados_por_pagina=%s WHERE id=%s", (tema, resultados, user_id))
-                conexao.commit()
-                conexao.close()
-                session["tema"] = tema
-                session["resultados"] = resultados
-                flash("Preferências salvas.", "sucesso")
-                return redirect(url_for("index"))
-            except Exception as e:
-                print("Erro onboarding:", e)
-                flash("Erro ao salvar.", "erro")
-    return render_template("onboarding.html")
+        try:
+            with obter_conexao() as conexao:
+                if conexao:
+                    with conexao.cursor() as cursor:
+                        cursor.execute("UPDATE users SET fez_onboarding=1, tema=%s, resultados_por_pagina=%s WHERE id=%s", (tema, resultados, user_id))
+                    conexao.commit()
+                    session["tema"] = tema
+                    session["resultados"] = resultados
+                    session["fez_onboarding"] = True
+                    flash("Preferências salvas.", "sucesso")
+                    return redirect(url_for("index"))
+        except Exception as e:
+            registrar_erro("onboarding_falhou", e)
+            flash("Erro ao salvar.", "erro")
+    return renderizar("onboarding.html")
 
 @app.route("/", methods=["GET", "POST"])
 def index():
     if "user_id" not in session: return redirect(url_for("login"))
-    conexao = conectar_banco()
-    if conexao:
-        try:
-            with conexao.cursor() as cursor:
-                cursor.execute("SELECT fez_onboarding FROM users WHERE id=%s", (session["user_id"],))
-                st = cursor.fetchone()
-            conexao.close()
-            if st and st[0] == 0: return redirect(url_for("onboarding"))
-        except: pass
+    if not carregar_perfil(): return redirect(url_for("onboarding"))
 
     resultados = []
     sentimentos = {"positivo": 0, "negativo": 0, "neutro": 0}
     termo = ""
+    fontes_status = {}
+    facetas = {}
+    origem = ""
     page = int(request.args.get('page', 1) or 1)
     per_page = int(request.args.get('per_page', session.get('resultados', 12) or 12) or 12)
     sources = request.values.getlist('sources') or []
-    source_filter = request.args.get('source', '').strip()
+    source_filter = request.values.get('source', '').strip()
+    fontes = selecionar_fontes(sources or [source_filter])
+    modo = request.values.get('modo', '')
+    sentimento_filtro = request.values.get('sentimento', '').strip()
+    mes = request.values.get('mes', '').strip()
+
+    if modo == "historico":
+        # Histórico não raspa nada, então também responde a GET (links das facetas).
+        termo = (request.values.get("termo") or "").strip()
+        total = 0
+        if termo:
+            try: historico = buscar_historico(termo, fontes, sentimento_filtro, mes, max(1, page), per_page)
+            except Exception as e:
+                registrar_erro("historico_falhou", e, termo=termo)
+                historico = False
+            if historico is None: flash("Banco indisponível: a busca no histórico precisa dele.", "erro")
+            elif historico is False: flash("Não foi possível buscar no histórico.", "erro")
+            else:
+                resultados, total = historico["resultados"], historico["total"]
+                sentimentos, facetas = historico["sentimentos"], historico["facetas"]
+                origem = "historico"
+        total_pages = max(1, math.ceil(total / per_page))
+        return renderizar("index.html", resultados=resultados, sentimentos=sentimentos, termo=termo, page=max(1, page), per_page=per_page, total=total, total_pages=total_pages, source_filter=source_filter, sources=sources, fontes_status=fontes_status, origem=origem, modo=modo, facetas=facetas, sentimento_filtro=sentimento_filtro, mes=mes, user_name=session.get('user_name'), tema=session.get('tema'))
 
     if request.method == "POST":
         termo = (request.form.get("termo") or request.form.get("palavra_chave") or "").strip()
         if termo:
-            resultados_g1 = raspar_g1(termo)
-            resultados_google = raspar_google_noticias(termo)
-            seen_links = set()
-            for r in (resultados_g1 + resultados_google):
-                link = r.get("link","")
-                if link in seen_links: continue
-                seen_links.add(link)
-                r["sentimento"] = analisar_sentimento(r.get("titulo",""))
-                resultados.append(r)
-                sentimentos[r["sentimento"]] += 1
-            if os.getenv('SAVE_TO_DB', '0') == '1':
-                salvar_no_banco(resultados, termo)
-
-    if sources:
-        lower = [s.lower() for s in sources]
-        resultados = [r for r in resultados if any(ls in (r.get('fonte') or '').lower() for ls in lower)]
-    elif source_filter:
-        resultados = [r for r in resultados if source_filter.lower() in (r.get('fonte') or '').lower()]
+            busca, origem = buscar_resultados(termo, fontes, revalidar=page <= 1)
+            resultados = busca["resultados"]
+            sentimentos = busca["sentimentos"]
+            fontes_status = busca["fontes_status"]
 
     total = len(resultados)
     total_pages = max(1, math.ceil(total / per_page))
@@ -495,54 +2421,198 @@ def index():
     end = start + per_page
     page_items = resultados[start:end]
 
-    return render_template("index.html", resultados=page_items, sentimentos=sentimentos, termo=termo, page=page, per_page=per_page, total=total, total_pages=total_pages, source_filter=source_filter, sources=sources, user_name=session.get('user_name'), tema=session.get('tema'))
+    return renderizar("index.html", resultados=page_items, sentimentos=sentimentos, termo=termo, page=page, per_page=per_page, total=total, total_pages=total_pages, source_filter=source_filter, sources=sources, fontes_status=fontes_status, origem=origem, modo=modo, facetas=facetas, sentimento_filtro=sentimento_filtro, mes=mes, user_name=session.get('user_name'), tema=session.get('tema'))
 
 @app.route('/api/search')
 def api_search():
+    """
+    Página de uma busca em JSON, servida do cache: só a raspagem da primeira página vai às fontes.
+    Com modo=historico a página vem do índice FULLTEXT das notícias gravadas (filtros sentimento e mes).
+    """
+    if "user_id" not in session: return jsonify({'erro': 'login necessário'}), 401
     termo = (request.args.get('termo') or '').strip()
-    return jsonify({'termo': termo, 'results': []}) # Simplificado
+    try: page = max(1, int(request.args.get('page', 1) or 1))
+    except ValueError: page = 1
+    try: per_page = min(100, max(1, int(request.args.get('per_page', session.get('resultados', 12) or 12) or 12)))
+    except ValueError: per_page = 12
+    sources = request.args.getlist('sources') or []
+    source_filter = request.args.get('source', '').strip()
+    fontes = selecionar_fontes(sources or [source_filter])
+    if not termo:
+        return jsonify({'termo': '', 'page': 1, 'per_page': per_page, 'total': 0, 'total_pages': 1, 'results': [], 'por_fonte': {}, 'sentimentos': {"positivo": 0, "negativo": 0, "neutro": 0}})
+
+    if request.args.get('modo') == 'historico':
+        try: historico = buscar_historico(termo, fontes, request.args.get('sentimento', '').strip(), request.args.get('mes', '').strip(), page, per_page)
+        except Exception as e:
+            registrar_erro("historico_falhou", e, termo=termo)
+            return jsonify({'erro': 'não foi possível buscar no histórico'}), 503
+        if historico is None: return jsonify({'erro': 'banco indisponível'}), 503
+        return jsonify({'termo': termo, 'page': page, 'per_page': per_page, 'total': historico["total"],
+                        'total_pages': max(1, math.ceil(historico["total"] / per_page)), 'results': historico["resultados"],
+                        'por_fonte': historico["facetas"]["fonte"], 'sentimentos': historico["sentimentos"],
+                        'facetas': historico["facetas"], 'fontes_status': {}, 'origem': 'historico'})
+
+    busca, origem = buscar_resultados(termo, fontes, revalidar=page == 1)
+    resultados = busca["resultados"]
+    por_fonte = {}
+    for r in resultados:
+        por_fonte[r.get("fonte", "")] = por_fonte.get(r.get("fonte", ""), 0) + 1
+    sentimentos = busca["sentimentos"]
+
+    total = len(resultados)
+    total_pages = max(1, math.ceil(total / per_page))
+    start = (page - 1) * per_page
+    return jsonify({'termo': termo, 'page': page, 'per_page': per_page, 'total': total, 'total_pages': total_pages,
+                    'results': resultados[start:start + per_page], 'por_fonte': por_fonte, 'sentimentos': sentimentos,
+                    'fontes_status': busca["fontes_status"], 'origem': origem})
+
+@app.route('/api/tendencia')
+def api_tendencia():
+    """Sentimento por dia do termo (ou de todos), lido das contagens agregadas: ?termo=&dias=30&fonte=."""
+    if "user_id" not in session: return jsonify({'erro': 'login necessário'}), 401
+    termo = (request.args.get('termo') or '').strip()
+    fonte = (request.args.get('fonte') or '').strip() or None
+    try: dias = min(TENDENCIA_MAX_DIAS, max(1, int(request.args.get('dias', 30) or 30)))
+    except ValueError: dias = 30
+    try: tendencia = tendencia_sentimento(termo, dias, fonte)
+    except Exception as e:
+        registrar_erro("tendencia_falhou", e)
+        return jsonify({'erro': 'não foi possível ler as tendências'}), 500
+    if tendencia is None: return jsonify({'erro': 'banco indisponível'}), 503
+    return jsonify(tendencia)
+
+@app.route('/api/jobs', methods=['POST'])
+def api_jobs_criar():
+    """Enfileira a busca e devolve o id do job na hora; o cliente consulta /api/jobs/<id>."""
+    if "user_id" not in session: return jsonify({'erro': 'login necessário'}), 401
+    dados = request.get_json(silent=True) or request.form
+    termo = (dados.get('termo') or '').strip()
+    if not termo: return jsonify({'erro': 'termo obrigatório'}), 400
+    sources = dados.getlist('sources') if hasattr(dados, 'getlist') else dados.get('sources') or []
+    fontes = selecionar_fontes([sources] if isinstance(sources, str) else sources)
+    job = fila_jobs().submeter(termo, fontes)
+    if job is None: return jsonify({'erro': 'fila de buscas cheia, tente novamente'}), 503
+    resposta = job.para_json()
+    resposta['url'] = url_for('api_jobs_status', job_id=job.id)
+    return jsonify(resposta), 202
+
+@app.route('/api/jobs/<job_id>')
+def api_jobs_status(job_id):
+    if "user_id" not in session: return jsonify({'erro': 'login necessário'}), 401
+    job = fila_jobs().obter(job_id)
+    if job is None: return jsonify({'erro': 'job não encontrado'}), 404
+    return jsonify(job.para_json())
+
+def _evento_sse(nome, dados):
+    return f"event: {nome}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+@app.route('/api/search/stream')
+def api_search_stream():
+    """
+    Server-Sent Events da busca: cada artigo sai num evento "artigo" assim que a fonte dele
+    responde e é classificado, seguido de "sentimentos" com a contagem parcial; "fonte" traz o
+    status de cada fonte e "fim" o resumo. Termo em cache sai inteiro de uma vez, mesmo velho
+    (origem "stale"), e aí a atualização roda em segundo plano como em buscar_resultados.
+    """
+    if "user_id" not in session: return jsonify({'erro': 'login necessário'}), 401
+    termo = (request.args.get('termo') or '').strip()
+    if not termo: return jsonify({'erro': 'termo obrigatório'}), 400
+    fontes = selecionar_fontes(request.args.getlist('sources') or [request.args.get('source', '')])
+    busca, origem_cache = _consultar_cache(termo, fontes)
+    job = None if busca is not None else fila_jobs().submeter(termo, fontes)
+    if busca is None and job is None: return jsonify({'erro': 'fila de buscas cheia, tente novamente'}), 503
+
+    def resumo(busca, origem):
+        return {"termo": termo, "total": len(busca["resultados"]), "sentimentos": busca["sentimentos"],
+                "fontes_status": busca["fontes_status"], "origem": origem}
+
+    def gerar():
+        if busca is not None:
+            for r in busca["resultados"]: yield _evento_sse("artigo", r)
+            yield _evento_sse("sentimentos", busca["sentimentos"])
+            yield _evento_sse("fim", resumo(busca, origem_cache))
+            return
+        enviados, lidos = 0, 0
+        while True:
+            eventos, terminou = job.eventos_desde(lidos, timeout=10)
+            lidos += len(eventos)
+            for ev in eventos:
+                if ev["etapa"] == "artigos":
+                    for r in ev["artigos"]: yield _evento_sse("artigo", r)
+                    enviados += len(ev["artigos"])
+                    yield _evento_sse("sentimentos", ev["sentimentos"])
+                elif ev["etapa"] == "fonte":
+                    yield _evento_sse("fonte", {k: v for k, v in ev.items() if k != "etapa"})
+            if terminou and len(job.progresso) == lidos: break
+            if not eventos: yield ": ping\n\n"
+        if job.erro:
+            yield _evento_sse("erro", {"erro": job.erro})
+            return
+        if not enviados:
+            # Job resolvido pelo cache (outra requisição raspou antes): manda tudo agora.
+            for r in job.resultado["resultados"]: yield _evento_sse("artigo", r)
+        yield _evento_sse("sentimentos", job.resultado["sentimentos"])
+        yield _evento_sse("fim", resumo(job.resultado, "ao_vivo"))
+
+    return Response(stream_with_context(gerar()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.route('/health')
 def health(): return 'ok'
 
+@app.route('/metrics')
+def metrics():
+    """Métricas no formato texto do Prometheus. São por processo: cada worker do gunicorn expõe as suas."""
+    if METRICAS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICAS_TOKEN}": return "não autorizado", 401
+    for tipo, valor in memoria_processo().items(): MEMORIA_BYTES.definir(valor, tipo=tipo)
+    for chave, fonte in FONTES.items():
+        atual = fonte.disjuntor.estado
+        for estado in ("fechado", "meio-aberto", "aberto"): DISJUNTOR_ESTADO.definir(int(estado == atual), fonte=chave, estado=estado)
+    return Response(exportar_metricas(), mimetype="text/plain; version=0.0.4")
+
 # --- ROTA PARA CRIAR O BANCO (NOVA) ---
 @app.route("/setup_banco")
 def setup_banco():
-    conexao = conectar_banco()
-    if not conexao:
-        return "❌ ERRO: Não foi possível conectar ao banco. Verifique as variáveis de ambiente no Railway."
     try:
-        with conexao.cursor() as cursor:
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                nome VARCHAR(255) NOT NULL,
-                email VARCHAR(255) NOT NULL UNIQUE,
-                senha VARCHAR(255) NOT NULL,
-                tema VARCHAR(50) DEFAULT 'claro',
-                resultados_por_pagina INT DEFAULT 12,
-                fez_onboarding TINYINT(1) DEFAULT 0
-            );
-            """)
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS noticias (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                titulo TEXT,
-                link TEXT,
-                fonte VARCHAR(255),
-                sentimento VARCHAR(50),
-                termo VARCHAR(255),
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            """)
-        conexao.commit()
-        conexao.close()
-        return "✅ SUCESSO! As tabelas 'users' e 'noticias' foram criadas. Agora você pode ir para /register e se cadastrar!"
+        with obter_conexao() as conexao:
+            if not conexao:
+                return "❌ ERRO: Não foi possível conectar ao banco. Verifique as variáveis de ambiente no Railway."
+            with conexao.cursor() as cursor:
+                cursor.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    nome VARCHAR(255) NOT NULL,
+                    email VARCHAR(255) NOT NULL UNIQUE,
+                    senha VARCHAR(255) NOT NULL,
+                    tema VARCHAR(50) DEFAULT 'claro',
+                    resultados_por_pagina INT DEFAULT 12,
+                    fez_onboarding TINYINT(1) DEFAULT 0
+                );
+                """)
+                cursor.execute("""
+                CREATE TABLE IF NOT EXISTS noticias (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    titulo TEXT,
+                    link TEXT,
+                    fonte VARCHAR(255),
+                    sentimento VARCHAR(50),
+                    termo VARCHAR(255),
+                    data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                """)
+            conexao.commit()
+            versoes = aplicar_migracoes(conexao)
+        return f"✅ SUCESSO! As tabelas 'users' e 'noticias' foram criadas (schema na versão {max(versoes)}). Agora você pode ir para /register e se cadastrar!"
     except Exception as e:
         return f"Erro ao criar tabelas: {e}"
 
+INICIO_SEGUNDOS.definir(round(time.perf_counter() - _inicio_import, 6), fase="import")
+
 if __name__ == "__main__":
-    port = int(os.environ.get("PORT", 5000))
-    app.run(host='0.0.0.0', port=port)
+    if sys.argv[1:2] == ["crawler"]:
+        rodar_crawler()
+    else:
+        port = int(os.environ.get("PORT", 5000))
+        app.run(host='0.0.0.0', port=port)
 
 
@@ -7,6 +7,20 @@ document.addEventListener('DOMContentLoaded', function () {
   var termo = document.getElementById('termo');
 
   if (form) {
+    // Filtros escolhidos (fonte, facetas do histórico) valem para o termo e o modo da página atual:
+    // buscar outro termo ou trocar de modo começa sem eles, inclusive no stream e no "carregar mais"
+    form.addEventListener('submit', function () {
+      var termoVal = ((termo || {}).value || '').trim();
+      var modo = (document.getElementById('modoHistorico')||{}).checked ? 'historico' : '';
+      if (termoVal !== (form.getAttribute('data-termo') || '') || modo !== (form.getAttribute('data-modo') || '')) {
+        ['source', 'sentimento', 'mes'].forEach(function (nome) {
+          var campo = form.querySelector('input[name="' + nome + '"]');
+          if (campo) campo.value = '';
+        });
+        form.setAttribute('data-termo', termoVal);
+        form.setAttribute('data-modo', modo);
+      }
+    });
     form.addEventListener('submit', function () {
       if (loader) {
         loader.hidden = false;
@@ -39,8 +53,13 @@ document.addEventListener('DOMContentLoaded', function () {
         var source = (document.querySelector('input[name="source"]')||{}).value || '';
         var termoVal = (document.getElementById('termo')||{}).value || '';
         if (!termoVal) return;
+        var historico = '';
+        if ((document.getElementById('modoHistorico')||{}).checked) {
+          historico = '&modo=historico&sentimento=' + encodeURIComponent((document.querySelector('input[name="sentimento"]')||{}).value || '') +
+                      '&mes=' + encodeURIComponent((document.querySelector('input[name="mes"]')||{}).value || '');
+        }
         loadMoreBtn.disabled = true;
-        fetch(`/api/search?termo=${encodeURIComponent(termoVal)}&page=${nextPage}&per_page=${perPage}&source=${encodeURIComponent(source)}`)
+        fetch(`/api/search?termo=${encodeURIComponent(termoVal)}&page=${nextPage}&per_page=${perPage}&source=${encodeURIComponent(source)}${historico}`)
           .then(function (res) { return res.json(); })
           .then(function (data) {
             appendArticles(data.results || []);
@@ -58,6 +77,74 @@ document.addEventListener('DOMContentLoaded', function () {
       });
     }
 
+    // Busca progressiva: os artigos chegam por Server-Sent Events conforme cada fonte responde
+    if (form && window.EventSource) {
+      form.addEventListener('submit', function (ev) {
+        var termoVal = ((termo || {}).value || '').trim();
+        if (!termoVal) return;
+        // Histórico responde direto do banco: o POST normal já é rápido
+        if ((document.getElementById('modoHistorico')||{}).checked) return;
+        ev.preventDefault();
+        iniciarStream(termoVal);
+      });
+    }
+
+    function iniciarStream(termoVal) {
+      var container = document.querySelector('.noticias');
+      if (container) container.innerHTML = '';
+      var resumo = document.getElementById('resumo');
+      if (resumo) resumo.hidden = false;
+      var termoAtual = document.getElementById('termoAtual');
+      if (termoAtual) termoAtual.textContent = termoVal;
+      var status = document.getElementById('fontesStatus');
+      if (status) status.innerHTML = '';
+      if (loadMoreBtn) loadMoreBtn.style.display = 'none';
+      atualizarContagem({ positivo: 0, negativo: 0, neutro: 0 });
+
+      var recebeu = false;
+      var source = (document.querySelector('input[name="source"]')||{}).value || '';
+      var es = new EventSource('/api/search/stream?termo=' + encodeURIComponent(termoVal) + '&source=' + encodeURIComponent(source));
+      es.addEventListener('artigo', function (e) {
+        recebeu = true;
+        appendArticles([JSON.parse(e.data)]);
+      });
+      es.addEventListener('sentimentos', function (e) { atualizarContagem(JSON.parse(e.data)); });
+      es.addEventListener('fonte', function (e) { mostrarFonte(JSON.parse(e.data)); });
+      es.addEventListener('fim', function () { es.close(); terminar(); });
+      es.addEventListener('erro', function () { es.close(); terminar(); });
+      es.onerror = function () {
+        es.close();
+        terminar();
+        // Sem stream (login expirado, fila cheia...): cai para o POST normal
+        if (!recebeu && form) form.submit();
+      };
+    }
+
+    function terminar() {
+      if (loader) {
+        loader.hidden = true;
+        loader.setAttribute('aria-hidden', 'true');
+      }
+      if (buscar) buscar.removeAttribute('aria-disabled');
+    }
+
+    function atualizarContagem(s) {
+      ['positivo', 'negativo', 'neutro'].forEach(function (k) {
+        var el = document.getElementById('cont' + k.charAt(0).toUpperCase() + k.slice(1));
+        if (el) el.textContent = String(s[k] || 0);
+      });
+    }
+
+    function mostrarFonte(s) {
+      var status = document.getElementById('fontesStatus');
+      if (!status) return;
+      var badge = document.createElement('span');
+      badge.className = 'badge fonte-' + s.status;
+      var extra = {timeout: ' (tempo esgotado)', erro: ' (falhou)', pulada: ' (em pausa)', limitada: ' (limite de requisições)', ocupada: ' (ocupada)'}[s.status] || '';
+      badge.textContent = s.fonte + ': ' + s.total + ' em ' + Number(s.tempo || 0).toFixed(1) + 's' + extra;
+      status.appendChild(badge);
+    }
+
     function appendArticles(items) {
       var container = document.querySelector('.noticias');
       if (!container) {
@@ -73,12 +160,25 @@ document.addEventListener('DOMContentLoaded', function () {
         var p = document.createElement('p'); p.className = 'meta';
         var badge = document.createElement('span'); badge.className = 'badge'; badge.textContent = it.fonte || '';
         p.appendChild(badge);
+        if (it.data) {
+          var db = document.createElement('span'); db.className = 'badge'; db.textContent = it.data.slice(0, 10);
+          p.appendChild(db);
+        }
         if (it.sentimento) {
           var sb = document.createElement('span'); sb.className = 'badge sentimento ' + it.sentimento; sb.textContent = it.sentimento.charAt(0).toUpperCase()+it.sentimento.slice(1);
           p.appendChild(sb);
         }
-  var a = document.createElement('a'); a.href = it.orig_link || it.link || '#'; a.target = '_blank'; a.rel = 'noopener noreferrer'; a.textContent = 'Ler notícia completa';
+  var a = document.createElement('a'); a.href = it.link || it.orig_link || '#'; a.target = '_blank'; a.rel = 'noopener noreferrer'; a.textContent = 'Abrir notícia';
         art.appendChild(h); art.appendChild(p); art.appendChild(a);
+        if (it.alternativas && it.alternativas.length) {
+          var alt = document.createElement('p'); alt.className = 'alternativas'; alt.textContent = 'Também em: ';
+          it.alternativas.forEach(function (x, i) {
+            if (i) alt.appendChild(document.createTextNode(', '));
+            var l = document.createElement('a'); l.href = x.link; l.target = '_blank'; l.rel = 'noopener noreferrer'; l.title = x.titulo || ''; l.textContent = x.fonte || x.link;
+            alt.appendChild(l);
+          });
+          art.appendChild(alt);
+        }
         container.appendChild(art);
       });
     }